@@ -1,8 +1,14 @@
+import asyncio
+import codecs
+import hashlib
+import io
 import json
 import os
 import re
+from functools import lru_cache
 from typing import Any
 
+import diskcache
 import httpx
 from openai import AsyncOpenAI
 from fastapi import FastAPI, HTTPException
@@ -16,6 +22,11 @@ app = FastAPI(title="GitHub Repository Summarizer")
 
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN")  # optional, raises rate limits
+CACHE_DIR = os.environ.get("CACHE_DIR")  # optional, enables the LLM response cache
+LLM_MODEL = "gpt-4o-mini"
+
+# How long cached LLM responses stay valid (seconds).
+CACHE_TTL_SECONDS = 86_400
 
 # Maximum total characters of file content we send to the LLM.
 MAX_CONTENT_CHARS = 120_000
@@ -23,16 +34,20 @@ MAX_CONTENT_CHARS = 120_000
 MAX_FILE_CHARS = 8_000
 # Maximum number of files whose content we fetch.
 MAX_FILES_TO_FETCH = 60
+# Maximum number of concurrent raw file downloads.
+MAX_CONCURRENT_FETCHES = 16
+# Leading bytes checked for NUL to detect binary files.
+BINARY_SNIFF_BYTES = 1024
 
 # Directories / path segments to always skip.
-SKIP_DIRS = {
+SKIP_DIRS = frozenset({
     "node_modules", ".git", "vendor", "dist", "build", "__pycache__",
     ".next", ".nuxt", ".output", ".cache", ".tox", ".mypy_cache",
     ".pytest_cache", "venv", ".venv", "env", ".env", "eggs",
     ".eggs", "bower_components", "jspm_packages", ".gradle",
     "target", "out", "bin", "obj", ".idea", ".vscode",
     "coverage", ".nyc_output", "htmlcov",
-}
+})
 
 # File extensions to always skip (binary / non-informative).
 SKIP_EXTENSIONS = {
@@ -47,6 +62,13 @@ SKIP_EXTENSIONS = {
     ".min.js", ".min.css", ".map",
 }
 
+# All skipped extensions (including compound ones like .min.js) as one
+# anchored alternation, so a filename is checked in a single regex scan.
+SKIP_EXT_RE = re.compile(
+    "(?:" + "|".join(re.escape(ext) for ext in SKIP_EXTENSIONS) + ")$",
+    re.IGNORECASE,
+)
+
 # Filenames to always skip.
 SKIP_FILES = {
     "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock",
@@ -55,7 +77,7 @@ SKIP_FILES = {
 }
 
 # Files that are high-priority for understanding a project (fetched first).
-PRIORITY_FILES = {
+PRIORITY_FILES = frozenset({
     "README.md", "README.rst", "README.txt", "README",
     "package.json", "pyproject.toml", "setup.py", "setup.cfg",
     "Cargo.toml", "go.mod", "build.gradle", "pom.xml",
@@ -63,10 +85,18 @@ PRIORITY_FILES = {
     "Dockerfile", "docker-compose.yml", "docker-compose.yaml",
     ".github/workflows", "requirements.txt",
     "tsconfig.json", "webpack.config.js", "vite.config.ts", "vite.config.js",
-}
+})
+
+# Lowercased README / config filenames, matched case-insensitively.
+README_NAMES = frozenset({"readme.md", "readme.rst", "readme.txt", "readme"})
+CONFIG_NAMES = frozenset({
+    "package.json", "pyproject.toml", "setup.py", "cargo.toml",
+    "go.mod", "gemfile", "composer.json", "pom.xml", "build.gradle",
+    "makefile", "cmakelists.txt", "dockerfile",
+})
 
 # Extensions that are likely informative source code.
-SOURCE_EXTENSIONS = {
+SOURCE_EXTENSIONS = frozenset({
     ".py", ".js", ".ts", ".tsx", ".jsx", ".go", ".rs", ".java",
     ".rb", ".php", ".c", ".cpp", ".h", ".hpp", ".cs", ".swift",
     ".kt", ".scala", ".ex", ".exs", ".erl", ".hs", ".clj",
@@ -74,7 +104,7 @@ SOURCE_EXTENSIONS = {
     ".yaml", ".yml", ".toml", ".json", ".xml", ".html", ".css",
     ".scss", ".sass", ".less", ".md", ".rst", ".txt",
     ".sql", ".graphql", ".proto", ".tf", ".hcl",
-}
+})
 
 
 # ---------------------------------------------------------------------------
@@ -100,10 +130,12 @@ class ErrorResponse(BaseModel):
 # GitHub helpers
 # ---------------------------------------------------------------------------
 
+GITHUB_URL_RE = re.compile(r"github\.com/([^/]+)/([^/]+?)(?:\.git)?(?:/.*)?$")
+
+
 def parse_github_url(url: str) -> tuple[str, str]:
     """Extract owner and repo name from a GitHub URL."""
-    pattern = r"github\.com/([^/]+)/([^/]+?)(?:\.git)?(?:/.*)?$"
-    match = re.search(pattern, url.strip().rstrip("/"))
+    match = GITHUB_URL_RE.search(url.strip().rstrip("/"))
     if not match:
         raise ValueError(f"Invalid GitHub repository URL: {url}")
     return match.group(1), match.group(2)
@@ -116,56 +148,55 @@ def _github_headers() -> dict[str, str]:
     return headers
 
 
+@lru_cache(maxsize=4096)
+def _skip_basename(filename: str) -> bool:
+    """Return True if a filename alone marks a file for exclusion."""
+    if filename in SKIP_FILES:
+        return True
+
+    # Check extensions (handle compound like .min.js).
+    return SKIP_EXT_RE.search(filename) is not None
+
+
 def _should_skip(path: str) -> bool:
     """Return True if a file path should be excluded from analysis."""
     parts = path.split("/")
 
     # Skip if any directory segment is in the skip list.
-    for part in parts[:-1]:
-        if part in SKIP_DIRS:
-            return True
-
-    filename = parts[-1]
-    if filename in SKIP_FILES:
+    if any(part in SKIP_DIRS for part in parts[:-1]):
         return True
 
-    # Check extensions (handle compound like .min.js).
-    lower = filename.lower()
-    for ext in SKIP_EXTENSIONS:
-        if lower.endswith(ext):
-            return True
-
-    return False
-
+    return _skip_basename(parts[-1])
 
-def _priority_score(path: str) -> int:
-    """Lower score = higher priority. Used to sort files for fetching."""
-    filename = path.split("/")[-1]
-    depth = path.count("/")
 
+@lru_cache(maxsize=4096)
+def _basename_score(filename: str) -> tuple[int, int]:
+    """Return (base score, per-directory-level penalty) for a filename."""
     # Exact priority file matches.
     if filename in PRIORITY_FILES:
-        return -1000 + depth
+        return -1000, 1
 
     # Config / manifest files at shallow depth.
     lower = filename.lower()
-    if lower in {"readme.md", "readme.rst", "readme.txt", "readme"}:
-        return -900
+    if lower in README_NAMES:
+        return -900, 0
+    if lower in CONFIG_NAMES:
+        return -800, 1
 
-    config_names = {
-        "package.json", "pyproject.toml", "setup.py", "cargo.toml",
-        "go.mod", "gemfile", "composer.json", "pom.xml", "build.gradle",
-        "makefile", "cmakelists.txt", "dockerfile",
-    }
-    if lower in config_names:
-        return -800 + depth
+    # Source files — prefer shallower files. Like os.path.splitext, leading
+    # dots (".bashrc") do not start an extension.
+    dot = lower.rfind(".")
+    if dot > 0 and (lower[0] != "." or lower[:dot].lstrip(".")):
+        if lower[dot:] in SOURCE_EXTENSIONS:
+            return 0, 10
 
-    # Source files — prefer shallower files.
-    _, ext = os.path.splitext(lower)
-    if ext in SOURCE_EXTENSIONS:
-        return depth * 10
+    return 500, 1
 
-    return 500 + depth
+
+def _priority_score(path: str) -> int:
+    """Lower score = higher priority. Used to sort files for fetching."""
+    base, per_level = _basename_score(path[path.rfind("/") + 1:])
+    return base + path.count("/") * per_level
 
 
 async def fetch_repo_tree(client: httpx.AsyncClient, owner: str, repo: str) -> list[dict[str, Any]]:
@@ -182,49 +213,74 @@ async def fetch_repo_tree(client: httpx.AsyncClient, owner: str, repo: str) -> l
 
 
 async def fetch_file_content(client: httpx.AsyncClient, owner: str, repo: str, path: str) -> str | None:
-    """Fetch raw file content from GitHub."""
+    """Fetch raw file content from GitHub, reading at most MAX_FILE_CHARS bytes."""
     url = f"https://raw.githubusercontent.com/{owner}/{repo}/HEAD/{path}"
+    # raw.githubusercontent.com honours Range, so the server never sends more
+    # than we keep; the read loop below still bounds servers that ignore it.
+    headers = {**_github_headers(), "Range": f"bytes=0-{MAX_FILE_CHARS - 1}"}
     try:
-        resp = await client.get(url, headers=_github_headers(), timeout=15, follow_redirects=True)
-        if resp.status_code != 200:
-            return None
-        # Skip binary content.
-        content_type = resp.headers.get("content-type", "")
-        if "application/octet-stream" in content_type and not path.endswith((".md", ".txt", ".rst")):
-            return None
-        text = resp.text
-        if "\x00" in text[:1000]:  # binary heuristic
-            return None
-        return text[:MAX_FILE_CHARS]
+        async with client.stream(
+            "GET", url, headers=headers, timeout=15, follow_redirects=True
+        ) as resp:
+            if resp.status_code not in (200, 206):
+                return None
+            # Skip binary content.
+            content_type = resp.headers.get("content-type", "")
+            if "application/octet-stream" in content_type and not path.endswith((".md", ".txt", ".rst")):
+                return None
+            body = bytearray()
+            async for chunk in resp.aiter_bytes(chunk_size=8192):
+                # Binary heuristic on the raw leading bytes, before decoding.
+                sniff = BINARY_SNIFF_BYTES - len(body)
+                if sniff > 0 and b"\x00" in chunk[:sniff]:
+                    return None
+                body += chunk
+                if len(body) >= MAX_FILE_CHARS:
+                    break
+        # Drop a multi-byte character split at the cut instead of mangling it.
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        return decoder.decode(bytes(body[:MAX_FILE_CHARS]))
     except Exception:
         return None
 
 
 def build_tree_string(file_paths: list[str]) -> str:
     """Build a directory-tree representation from a list of file paths."""
-    tree: dict = {}
-    for path in sorted(file_paths):
-        parts = path.split("/")
-        node = tree
-        for part in parts:
-            node = node.setdefault(part, {})
+    # Sorting the split paths orders siblings level by level, so one scan
+    # with a longest-common-prefix against the previous path yields every
+    # tree node in render order as (depth, name).
+    nodes: list[tuple[int, str]] = []
+    prev: list[str] = []
+    for parts in sorted(path.split("/") for path in file_paths):
+        lcp = 0
+        limit = min(len(prev), len(parts))
+        while lcp < limit and prev[lcp] == parts[lcp]:
+            lcp += 1
+        for depth in range(lcp, len(parts)):
+            nodes.append((depth, parts[depth]))
+        prev = parts
+
+    # A node is the last among its siblings if no later node at the same
+    # depth appears before the walk climbs back above that depth.
+    is_last = [False] * len(nodes)
+    sibling_follows: list[bool] = []
+    for i in range(len(nodes) - 1, -1, -1):
+        depth = nodes[i][0]
+        del sibling_follows[depth + 1:]
+        if len(sibling_follows) <= depth:
+            sibling_follows.extend([False] * (depth + 1 - len(sibling_follows)))
+        is_last[i] = not sibling_follows[depth]
+        sibling_follows[depth] = True
 
     lines: list[str] = []
-
-    def _render(node: dict, prefix: str = ""):
-        entries = sorted(node.keys())
-        for i, name in enumerate(entries):
-            is_last = i == len(entries) - 1
-            connector = "`-- " if is_last else "|-- "
-            lines.append(f"{prefix}{connector}{name}")
-            if node[name]:  # has children (directory)
-                extension = "    " if is_last else "|   "
-                _render(node[name], prefix + extension)
-
-    _render(tree)
-    # Cap tree length.
-    if len(lines) > 200:
-        lines = lines[:200] + [f"... and {len(lines) - 200} more entries"]
+    prefixes = [""]  # prefixes[d] is the indentation for nodes at depth d
+    for (depth, name), last in zip(nodes, is_last):
+        if len(lines) == 200:  # Cap tree length.
+            lines.append(f"... and {len(nodes) - 200} more entries")
+            break
+        del prefixes[depth + 1:]
+        lines.append(f"{prefixes[depth]}{'`-- ' if last else '|-- '}{name}")
+        prefixes.append(prefixes[depth] + ("    " if last else "|   "))
     return "\n".join(lines)
 
 
@@ -233,7 +289,8 @@ async def gather_repo_context(owner: str, repo: str) -> str:
     Fetch repository metadata, directory tree, and key file contents.
     Returns a single string ready to be sent to the LLM.
     """
-    async with httpx.AsyncClient() as client:
+    limits = httpx.Limits(max_connections=32, max_keepalive_connections=32)
+    async with httpx.AsyncClient(http2=True, limits=limits) as client:
         # 1. Get file tree.
         tree_items = await fetch_repo_tree(client, owner, repo)
         all_paths = [item["path"] for item in tree_items]
@@ -245,35 +302,42 @@ async def gather_repo_context(owner: str, repo: str) -> str:
         # 3. Build directory tree string (from ALL non-skipped paths).
         tree_str = build_tree_string(candidate_paths)
 
-        # 4. Fetch content of the most important files.
+        # 4. Fetch content of the most important files concurrently.
         files_to_fetch = candidate_paths[:MAX_FILES_TO_FETCH]
-        file_contents: dict[str, str] = {}
-        total_chars = 0
-
-        for path in files_to_fetch:
-            if total_chars >= MAX_CONTENT_CHARS:
-                break
-            content = await fetch_file_content(client, owner, repo, path)
-            if content:
-                file_contents[path] = content
-                total_chars += len(content)
-
-    # 5. Assemble context document.
-    sections = [
-        f"# Repository: {owner}/{repo}\n",
-        "## Directory Structure\n```",
-        tree_str,
-        "```\n",
-    ]
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+
+        async def _fetch_one(path: str) -> tuple[str, str | None]:
+            async with semaphore:
+                return path, await fetch_file_content(client, owner, repo, path)
+
+        results = await asyncio.gather(*[_fetch_one(p) for p in files_to_fetch])
+
+    # Results come back in priority order; apply the total budget afterwards.
+    file_contents: dict[str, str] = {}
+    total_chars = 0
+    for path, content in results:
+        if total_chars >= MAX_CONTENT_CHARS:
+            break
+        if content:
+            file_contents[path] = content
+            total_chars += len(content)
+
+    # 5. Assemble context document in a single buffer.
+    buf = io.StringIO()
+    buf.write(f"# Repository: {owner}/{repo}\n\n## Directory Structure\n```\n")
+    buf.write(tree_str)
+    buf.write("\n```\n")
 
     if file_contents:
-        sections.append("## File Contents\n")
+        buf.write("\n## File Contents\n")
         for path, content in file_contents.items():
-            sections.append(f"### {path}\n```")
-            sections.append(content)
-            sections.append("```\n")
+            buf.write("\n### ")
+            buf.write(path)
+            buf.write("\n```\n")
+            buf.write(content)
+            buf.write("\n```\n")
 
-    return "\n".join(sections)
+    return buf.getvalue()
 
 
 # ---------------------------------------------------------------------------
@@ -296,9 +360,47 @@ Guidelines:
 - For "structure": Describe the high-level layout. Mention important directories and what they contain.
 - Return ONLY the JSON object, no markdown code fences, no extra text."""
 
+# Structured outputs: the API enforces this schema, so the reply needs no
+# fence stripping or key validation.
+LLM_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "RepoSummary",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "summary": {"type": "string"},
+                "technologies": {"type": "array", "items": {"type": "string"}},
+                "structure": {"type": "string"},
+            },
+            "required": ["summary", "technologies", "structure"],
+            "additionalProperties": False,
+        },
+        "strict": True,
+    },
+}
+
+
+_llm_cache = diskcache.Cache(CACHE_DIR) if CACHE_DIR else None
+
 
 async def call_llm(context: str) -> dict[str, Any]:
     """Send the repository context to OpenAI and parse the structured response."""
+    user_prompt = f"""Analyze the following GitHub repository and provide a structured summary.
+
+{context}
+
+Remember: respond with ONLY a valid JSON object with keys "summary", "technologies", and "structure"."""
+
+    # Check the cache before the API key so cached answers survive misconfiguration.
+    cache_key = hashlib.blake2b(
+        (LLM_MODEL + LLM_SYSTEM_PROMPT + user_prompt).encode("utf-8")
+    ).hexdigest()
+    if _llm_cache is not None:
+        cached = _llm_cache.get(cache_key)
+        if cached is not None:
+            return json.loads(cached)
+
     if not OPENAI_API_KEY:
         raise HTTPException(
             status_code=500,
@@ -307,41 +409,35 @@ async def call_llm(context: str) -> dict[str, Any]:
 
     client = AsyncOpenAI(api_key=OPENAI_API_KEY)
 
-    user_prompt = f"""Analyze the following GitHub repository and provide a structured summary.
-
-{context}
-
-Remember: respond with ONLY a valid JSON object with keys "summary", "technologies", and "structure"."""
-
     response = await client.chat.completions.create(
-        model="gpt-4o-mini",
+        model=LLM_MODEL,
         messages=[
             {"role": "system", "content": LLM_SYSTEM_PROMPT},
             {"role": "user", "content": user_prompt},
         ],
         temperature=0.3,
         max_tokens=2048,
-        response_format={"type": "json_object"},
+        response_format=LLM_RESPONSE_FORMAT,
     )
 
-    raw_text = response.choices[0].message.content.strip()
+    message = response.choices[0].message
+    if message.refusal:
+        raise HTTPException(
+            status_code=502,
+            detail=f"LLM refused to analyze the repository: {message.refusal}",
+        )
 
+    # A reply cut off at max_tokens is still invalid JSON despite the schema.
     try:
-        result = json.loads(raw_text)
-    except json.JSONDecodeError:
+        result = json.loads(message.content)
+    except (TypeError, json.JSONDecodeError):
         raise HTTPException(
             status_code=502,
-            detail=f"LLM returned invalid JSON: {raw_text[:500]}",
+            detail=f"LLM returned invalid JSON: {(message.content or '')[:500]}",
         )
 
-    # Validate expected keys.
-    for key in ("summary", "technologies", "structure"):
-        if key not in result:
-            raise HTTPException(
-                status_code=502,
-                detail=f"LLM response missing required key: {key}",
-            )
-
+    if _llm_cache is not None:
+        _llm_cache.set(cache_key, json.dumps(result), expire=CACHE_TTL_SECONDS)
     return result
 
 
@@ -8,11 +8,21 @@ class Settings:
     openai_model: str = "gpt-4o-mini"
     max_content_chars: int = 100_000  # ~25k tokens
     max_file_size_bytes: int = 100_000  # Skip files > 100KB
+    max_file_chars: int = 50_000  # Truncate each downloaded file
+    compress_file_contents: bool = True  # Strip comments/docstrings for the LLM
     github_request_timeout: float = 30.0
+    github_max_concurrency: int = 16  # Parallel raw file downloads
+    github_max_connections: int = 64  # Shared pool across requests
+    include_repo_metadata: bool = True  # Extra API call for stars/description
+    github_rate_limit_low: int = 50  # Remaining quota that throttles API calls
+    github_rate_limit_critical: int = 10  # ...and that serializes them
     openai_request_timeout: float = 120.0
+    cache_dir: str = ""  # Empty disables the response cache
+    cache_ttl_seconds: int = 86_400
 
 
 def get_settings() -> Settings:
     return Settings(
         openai_api_key=os.environ.get("OPENAI_API_KEY", ""),
+        cache_dir=os.environ.get("CACHE_DIR", ""),
     )
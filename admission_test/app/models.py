@@ -1,6 +1,8 @@
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, ConfigDict, field_validator
 import re
 
+_GH_URL_RE = re.compile(r"^https?://github\.com/[\w.\-]+/[\w.\-]+/?$")
+
 
 class SummarizeRequest(BaseModel):
     github_url: str
@@ -8,8 +10,7 @@ class SummarizeRequest(BaseModel):
     @field_validator("github_url")
     @classmethod
     def validate_github_url(cls, v: str) -> str:
-        pattern = r"^https?://github\.com/[\w.\-]+/[\w.\-]+/?$"
-        if not re.match(pattern, v):
+        if not _GH_URL_RE.match(v):
             raise ValueError(
                 "Invalid GitHub URL. Expected format: https://github.com/{owner}/{repo}"
             )
@@ -17,6 +18,11 @@ class SummarizeRequest(BaseModel):
 
 
 class SummarizeResponse(BaseModel):
+    # Summarizer validates the LLM output against this model before caching
+    # or returning it, so the router builds responses with model_construct()
+    # and skips a second validation pass.
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     summary: str
     technologies: list[str]
     structure: str
@@ -1,11 +1,100 @@
-from fastapi import APIRouter
+import asyncio
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import JSONResponse
+from app.config import Settings, get_settings
 from app.models import SummarizeRequest, SummarizeResponse, ErrorResponse
+from app.services.cache import ResponseCache, get_cache, make_cache_key
 from app.services.github_client import GitHubClient, GitHubClientError
-from app.services.llm_summarizer import Summarizer, SummarizerError
+from app.services.llm_summarizer import SYSTEM_PROMPT, Summarizer, SummarizerError
 
 router = APIRouter()
 
+# Pipelines currently running, keyed by canonical (owner, repo). Concurrent
+# requests for the same repository await the running task instead of
+# repeating the GitHub fetches and the LLM call.
+_inflight: dict[tuple[str, str], asyncio.Task] = {}
+
+
+def get_github_client(request: Request) -> GitHubClient:
+    """Build a GitHubClient on the app-wide HTTP pool and rate limiter."""
+    return GitHubClient(
+        http_client=getattr(request.app.state, "http_client", None),
+        rate_limiter=getattr(request.app.state, "github_limiter", None),
+    )
+
+
+def get_summarizer() -> Summarizer:
+    return Summarizer()
+
+
+def _summary_cache_key(settings: Settings, owner: str, repo: str, sha: str) -> str:
+    """Key a final summary on the commit and everything that shapes the answer.
+
+    GitHub owner/repo names are case-insensitive, so key on the lowercased form.
+    """
+    return make_cache_key(
+        "summary",
+        settings.openai_model,
+        SYSTEM_PROMPT,
+        str(settings.include_repo_metadata),
+        str(settings.compress_file_contents),
+        owner.lower(),
+        repo.lower(),
+        sha,
+    )
+
+
+async def _run_pipeline(
+    github_client: GitHubClient,
+    summarizer: Summarizer,
+    owner: str,
+    repo: str,
+    ref: str,
+    cache: ResponseCache | None,
+    summary_key: str | None,
+) -> dict:
+    """Fetch the repository, summarize it, and store the result if cached."""
+    repo_data = await github_client.fetch_repo_data(owner, repo, ref=ref)
+    result = await summarizer.summarize(repo_data)
+    if cache is not None and summary_key is not None:
+        await cache.aset(summary_key, result)
+    return result
+
+
+async def _run_deduplicated(
+    github_client: GitHubClient,
+    summarizer: Summarizer,
+    owner: str,
+    repo: str,
+    ref: str,
+    cache: ResponseCache | None,
+    summary_key: str | None,
+) -> dict:
+    """Run the pipeline once per repository across concurrent callers."""
+    key = (owner.lower(), repo.lower())
+    task = _inflight.get(key)
+    if task is None:
+        # The pipeline runs as its own task so no single caller owns it: a
+        # disconnecting first request must not fail the ones awaiting it.
+        task = asyncio.create_task(
+            _run_pipeline(
+                github_client, summarizer, owner, repo, ref, cache, summary_key
+            )
+        )
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _finish_inflight(key, t))
+    # shield() so a cancelled caller does not cancel the shared task
+    return await asyncio.shield(task)
+
+
+def _finish_inflight(key: tuple[str, str], task: asyncio.Task) -> None:
+    """Drop a finished pipeline and mark its error as retrieved."""
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    # Every caller may have gone away; avoid "exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
+
 
 @router.post(
     "/summarize",
@@ -20,25 +109,46 @@ router = APIRouter()
         504: {"model": ErrorResponse},
     },
 )
-async def summarize_repo(request: SummarizeRequest):
-    github_client = GitHubClient()
-    summarizer = Summarizer()
+async def summarize_repo(
+    request: SummarizeRequest,
+    github_client: GitHubClient = Depends(get_github_client),
+    summarizer: Summarizer = Depends(get_summarizer),
+):
+    settings = get_settings()
+    cache = get_cache(settings)
 
     # 1. Parse URL
     owner, repo = github_client.parse_github_url(request.github_url)
 
-    # 2. Fetch repo data from GitHub
+    # 2. Serve a cached summary if this repo was summarized at the same commit
+    # with the same model, prompt and content settings. The summary is cached under the resolved commit SHA, so the pipeline
+    # must read that same commit rather than whatever HEAD is by then.
+    summary_key = None
+    ref = "HEAD"
+    if cache is not None:
+        try:
+            sha = await github_client.resolve_head_sha(owner, repo)
+        except GitHubClientError as e:
+            return JSONResponse(
+                status_code=e.status_code,
+                content=ErrorResponse(message=e.message).model_dump(),
+            )
+        ref = sha
+        summary_key = _summary_cache_key(settings, owner, repo, sha)
+        cached = await cache.aget(summary_key)
+        if cached is not None:
+            return SummarizeResponse.model_construct(**cached)
+
+    # 3. Fetch repo data from GitHub and summarize with LLM
     try:
-        repo_data = await github_client.fetch_repo_data(owner, repo)
+        result = await _run_deduplicated(
+            github_client, summarizer, owner, repo, ref, cache, summary_key
+        )
     except GitHubClientError as e:
         return JSONResponse(
             status_code=e.status_code,
             content=ErrorResponse(message=e.message).model_dump(),
         )
-
-    # 3. Summarize with LLM
-    try:
-        result = await summarizer.summarize(repo_data)
     except SummarizerError as e:
         return JSONResponse(
             status_code=e.status_code,
@@ -50,4 +160,4 @@ async def summarize_repo(request: SummarizeRequest):
             content=ErrorResponse(message=f"Unexpected error: {str(e)}").model_dump(),
         )
 
-    return SummarizeResponse(**result)
+    return SummarizeResponse.model_construct(**result)
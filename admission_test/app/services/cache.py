@@ -0,0 +1,59 @@
+"""Persistent cache for LLM and summary responses, backed by diskcache."""
+
+import asyncio
+import hashlib
+import json
+from functools import lru_cache
+
+import diskcache
+
+from app.config import Settings
+
+
+def make_cache_key(*parts: str) -> str:
+    """Hash the given parts into a stable, fixed-length cache key."""
+    digest = hashlib.blake2b(digest_size=32)
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")  # Separator so ("ab", "c") != ("a", "bc")
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _open_cache(directory: str) -> diskcache.Cache:
+    # One Cache handle per directory for the lifetime of the process
+    return diskcache.Cache(directory)
+
+
+class ResponseCache:
+    """Stores JSON-serializable dicts on disk with a time-to-live.
+
+    get()/set() do blocking SQLite I/O, which can wait on diskcache's lock
+    under writer contention; async code should use aget()/aset() instead.
+    """
+
+    def __init__(self, cache: diskcache.Cache, ttl_seconds: int):
+        self._cache = cache
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> dict | None:
+        raw = self._cache.get(key)
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    def set(self, key: str, value: dict) -> None:
+        self._cache.set(key, json.dumps(value), expire=self.ttl_seconds)
+
+    async def aget(self, key: str) -> dict | None:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: dict) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+
+def get_cache(settings: Settings) -> ResponseCache | None:
+    """Return the configured cache, or None when caching is disabled."""
+    if not settings.cache_dir:
+        return None
+    return ResponseCache(_open_cache(settings.cache_dir), settings.cache_ttl_seconds)
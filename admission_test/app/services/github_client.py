@@ -1,8 +1,16 @@
 """GitHub API client for fetching repository data."""
 
+import asyncio
+import codecs
 import httpx
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
+from app.services.cache import get_cache, make_cache_key
+from app.utils.content_compressor import compress_content
 from app.utils.file_filter import rank_and_select_files, should_exclude_path
+from app.utils.json_utils import loads_json
+from app.utils.rate_limit import AdaptiveSemaphore
 from app.config import Settings, get_settings
 
 
@@ -19,6 +27,34 @@ class RepoData:
     file_contents: dict[str, str] = field(default_factory=dict)
 
 
+def create_http_client(settings: Settings) -> httpx.AsyncClient:
+    """Create the pooled HTTP/2 client used for GitHub requests."""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(settings.github_request_timeout),
+        limits=httpx.Limits(
+            max_connections=settings.github_max_connections,
+            max_keepalive_connections=settings.github_max_connections,
+        ),
+        http2=True,
+    )
+
+
+def create_rate_limiter(settings: Settings) -> AdaptiveSemaphore:
+    """Create the limiter for api.github.com calls, driven by X-RateLimit-*."""
+    return AdaptiveSemaphore(
+        capacity=settings.github_max_concurrency,
+        low_watermark=settings.github_rate_limit_low,
+        critical_watermark=settings.github_rate_limit_critical,
+        max_wait=settings.github_request_timeout,
+    )
+
+
+def _decode_utf8_prefix(data: bytes) -> str:
+    """Decode a UTF-8 byte prefix, dropping a character cut off at the end."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    return decoder.decode(data)
+
+
 class GitHubClientError(Exception):
     """Base error for GitHub client operations."""
 
@@ -28,21 +64,43 @@ class GitHubClientError(Exception):
         super().__init__(message)
 
 
+# Leading bytes checked for NUL to detect binaries that slipped past the
+# extension filters
+BINARY_SNIFF_BYTES = 1024
+
+
 class GitHubClient:
     GITHUB_API_BASE = "https://api.github.com"
     RAW_CONTENT_BASE = "https://raw.githubusercontent.com"
 
-    def __init__(self, settings: Settings | None = None):
+    def __init__(
+        self,
+        settings: Settings | None = None,
+        http_client: httpx.AsyncClient | None = None,
+        rate_limiter: AdaptiveSemaphore | None = None,
+    ):
         self.settings = settings or get_settings()
+        self._http = http_client
+        self._api_limiter = rate_limiter or create_rate_limiter(self.settings)
+        self.cache = get_cache(self.settings)
+
+    @asynccontextmanager
+    async def _session(self) -> AsyncIterator[httpx.AsyncClient]:
+        """Yield the shared HTTP client, or a short-lived one if none was given."""
+        if self._http is not None:
+            yield self._http
+            return
+        async with create_http_client(self.settings) as client:
+            yield client
 
     @staticmethod
     def parse_github_url(url: str) -> tuple[str, str]:
         """Extract owner and repo from a GitHub URL."""
         url = url.rstrip("/")
         parts = url.split("/")
-        # URL format: https://github.com/{owner}/{repo}
+        # URL format: https://github.com/{owner}/{repo}[.git]
         owner = parts[-2]
-        repo = parts[-1]
+        repo = parts[-1].removesuffix(".git")
         return owner, repo
 
     @staticmethod
@@ -68,60 +126,181 @@ class GitHubClient:
 
         return "\n".join(result_lines)
 
+    async def _api_get(
+        self, client: httpx.AsyncClient, url: str, accept: str
+    ) -> httpx.Response:
+        """GET from api.github.com, throttled by the remaining rate limit."""
+        async with self._api_limiter:
+            resp = await client.get(url, headers={"Accept": accept})
+        self._api_limiter.update(resp.headers)
+        return resp
+
+    @staticmethod
+    def _check_api_response(
+        resp: httpx.Response, owner: str, repo: str, failure_message: str
+    ) -> None:
+        """Map a non-200 GitHub API response to a GitHubClientError."""
+        if resp.status_code == 200:
+            return
+        if resp.status_code == 404:
+            raise GitHubClientError(
+                f"Repository not found: {owner}/{repo}", status_code=404
+            )
+        if resp.status_code == 409:  # Git Repository is empty
+            raise GitHubClientError(
+                "Repository appears empty or has no analyzable files",
+                status_code=422,
+            )
+        if resp.status_code == 403:
+            raise GitHubClientError(
+                "GitHub API rate limit exceeded. Try again later.",
+                status_code=429,
+            )
+        raise GitHubClientError(failure_message, status_code=502)
+
+    def _tree_url(self, owner: str, repo: str, ref: str) -> str:
+        return (
+            f"{self.GITHUB_API_BASE}/repos/{owner}/{repo}"
+            f"/git/trees/{ref}?recursive=1"
+        )
+
+    async def resolve_head_sha(self, owner: str, repo: str) -> str:
+        """Resolve the commit SHA of the default branch in one API call."""
+        url = f"{self.GITHUB_API_BASE}/repos/{owner}/{repo}/commits/HEAD"
+        async with self._session() as client:
+            resp = await self._api_get(client, url, "application/vnd.github.sha")
+
+        self._check_api_response(
+            resp, owner, repo, "Failed to resolve repository HEAD from GitHub"
+        )
+        return resp.text.strip()
+
+    async def _stream_prefix(
+        self, client: httpx.AsyncClient, url: str, length: int
+    ) -> bytes | None:
+        """Stream at most `length` bytes of a file, or None on HTTP failure."""
+        # The read loop enforces the bound even if the server ignores Range
+        headers = {"Range": f"bytes=0-{length - 1}"}
+        async with client.stream("GET", url, headers=headers) as resp:
+            if resp.status_code == 416:  # Empty file: no byte 0
+                return b""
+            if resp.status_code not in (200, 206):
+                return None
+            body = bytearray()
+            async for chunk in resp.aiter_bytes(chunk_size=8192):
+                # Give up on binaries before reading (or decoding) the rest
+                sniff = BINARY_SNIFF_BYTES - len(body)
+                if sniff > 0 and b"\x00" in chunk[:sniff]:
+                    return None
+                body += chunk
+                if len(body) >= length:
+                    break
+        return bytes(body)
+
+    async def _fetch_file(
+        self,
+        client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+        owner: str,
+        repo: str,
+        branch: str,
+        path: str,
+        sha: str = "",
+    ) -> tuple[str, str | None]:
+        """Download a single file, returning (path, text) or (path, None).
+
+        When the cache is enabled, processed contents are stored under the
+        blob SHA, so unchanged files are not downloaded again.
+        """
+        cache_key = None
+        if self.cache is not None and sha:
+            cache_key = make_cache_key(
+                "blob", path, sha,
+                str(self.settings.max_file_chars),
+                str(self.settings.compress_file_contents),
+            )
+            cached = await self.cache.aget(cache_key)
+            if cached is not None:
+                return path, cached["text"]
+
+        raw_url = f"{self.RAW_CONTENT_BASE}/{owner}/{repo}/{branch}/{path}"
+        limit = self.settings.max_file_chars
+        # Read one byte past the limit so we can tell the file was cut
+        length = limit + 1
+        async with semaphore:
+            try:
+                body = await self._stream_prefix(client, raw_url, length)
+            except (httpx.TimeoutException, httpx.HTTPError):
+                return path, None
+        # _stream_prefix returns None for binaries as well as HTTP failures
+        if body is None:
+            return path, None
+
+        text = _decode_utf8_prefix(body[:limit])
+        if self.settings.compress_file_contents:
+            # ast.parse/unparse on a 50KB file takes tens of milliseconds;
+            # keep it off the event loop so other requests are not stalled
+            text = await asyncio.to_thread(compress_content, path, text)
+        # Mark very large individual files as truncated
+        if len(body) > limit:
+            text += "\n\n... [truncated]"
+
+        if self.cache is not None and cache_key is not None:
+            await self.cache.aset(cache_key, {"text": text})
+        return path, text
+
     async def fetch_repo_data(
-        self, owner: str, repo: str
+        self, owner: str, repo: str, ref: str = "HEAD"
     ) -> RepoData:
-        """Fetch repository metadata, tree, and key file contents."""
-        timeout = httpx.Timeout(self.settings.github_request_timeout)
-
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            # 1. Fetch repo metadata
-            repo_url = f"{self.GITHUB_API_BASE}/repos/{owner}/{repo}"
-            repo_resp = await client.get(
-                repo_url, headers={"Accept": "application/vnd.github.v3+json"}
-            )
+        """Fetch repository metadata, tree, and key file contents.
 
-            if repo_resp.status_code == 404:
-                raise GitHubClientError(
-                    f"Repository not found: {owner}/{repo}", status_code=404
-                )
-            if repo_resp.status_code == 403:
-                raise GitHubClientError(
-                    "GitHub API rate limit exceeded. Try again later.",
-                    status_code=429,
+        `ref` pins the tree and file downloads to one commit; pass the SHA
+        from resolve_head_sha() so the data matches what it identified.
+        """
+        async with self._session() as client:
+            # 1. Fetch the full tree at `ref`. HEAD resolves to the default
+            # branch, so no metadata call is needed to find it. The metadata
+            # (description, stars, language) only feeds the prompt; when
+            # enabled it is fetched concurrently with the tree.
+            accept = "application/vnd.github.v3+json"
+            tree_request = self._api_get(
+                client, self._tree_url(owner, repo, ref), accept
+            )
+            repo_info: dict = {}
+            default_branch = "HEAD"
+            if self.settings.include_repo_metadata:
+                repo_url = f"{self.GITHUB_API_BASE}/repos/{owner}/{repo}"
+                repo_resp, tree_resp = await asyncio.gather(
+                    self._api_get(client, repo_url, accept), tree_request
                 )
-            if repo_resp.status_code != 200:
-                raise GitHubClientError(
+                self._check_api_response(
+                    repo_resp, owner, repo,
                     "Failed to fetch repository data from GitHub",
-                    status_code=502,
                 )
+                try:
+                    repo_info = loads_json(repo_resp.content)
+                except ValueError:
+                    raise GitHubClientError(
+                        "Failed to parse GitHub API response",
+                        status_code=502,
+                    )
+                default_branch = repo_info.get("default_branch", "main")
 
-            try:
-                repo_info = repo_resp.json()
-            except ValueError:
-                raise GitHubClientError(
-                    "Failed to parse GitHub API response",
-                    status_code=502,
-                )
-            default_branch = repo_info.get("default_branch", "main")
+                # 2. Fall back to the named default branch if HEAD did not
+                # resolve (a pinned commit must not silently move)
+                if tree_resp.status_code != 200 and ref == "HEAD":
+                    tree_resp = await self._api_get(
+                        client, self._tree_url(owner, repo, default_branch), accept
+                    )
+            else:
+                tree_resp = await tree_request
 
-            # 2. Fetch full tree
-            tree_url = (
-                f"{self.GITHUB_API_BASE}/repos/{owner}/{repo}"
-                f"/git/trees/{default_branch}?recursive=1"
-            )
-            tree_resp = await client.get(
-                tree_url, headers={"Accept": "application/vnd.github.v3+json"}
+            self._check_api_response(
+                tree_resp, owner, repo, "Failed to fetch repository tree from GitHub"
             )
 
-            if tree_resp.status_code != 200:
-                raise GitHubClientError(
-                    "Failed to fetch repository tree from GitHub",
-                    status_code=502,
-                )
-
             try:
-                tree_data = tree_resp.json()
+                tree_data = loads_json(tree_resp.content)
             except ValueError:
                 raise GitHubClientError(
                     "Failed to parse GitHub tree response",
@@ -129,19 +308,24 @@ class GitHubClient:
                 )
             tree_items = tree_data.get("tree", [])
 
-            # Filter to blobs (files) only
-            file_items = [
-                {"path": item["path"], "size": item.get("size", 0)}
-                for item in tree_items
-                if item.get("type") == "blob"
-            ]
-
-            # All paths (for directory tree display)
-            all_paths = [
-                item["path"]
-                for item in tree_items
-                if not should_exclude_path(item["path"])
-            ]
+            # Single pass over the tree: keep non-excluded blobs (directories
+            # are implied by file paths). Files over the size cap still show
+            # in the directory tree but are never fetched.
+            max_size = self.settings.max_file_size_bytes
+            all_paths: list[str] = []
+            file_items: list[dict] = []
+            for item in tree_items:
+                if item.get("type") != "blob":
+                    continue
+                path = item["path"]
+                if should_exclude_path(path):
+                    continue
+                all_paths.append(path)
+                size = item.get("size", 0)
+                if size <= max_size:
+                    file_items.append(
+                        {"path": path, "size": size, "sha": item.get("sha", "")}
+                    )
 
             # Build directory tree string
             directory_tree = self.build_directory_tree(all_paths)
@@ -152,31 +336,32 @@ class GitHubClient:
             content_budget = self.settings.max_content_chars - tree_chars - 2000
             content_budget = max(content_budget, 10000)  # At least 10k chars
 
+            # file_items already passed should_exclude_path above
             selected_files = rank_and_select_files(
-                file_items, max_chars=content_budget
+                file_items, max_chars=content_budget, prefiltered=True
+            )
+
+            # 4. Fetch file contents from raw.githubusercontent.com at the
+            # same ref as the tree (it accepts HEAD as well as commit SHAs)
+            semaphore = asyncio.Semaphore(self.settings.github_max_concurrency)
+            results = await asyncio.gather(
+                *[
+                    self._fetch_file(
+                        client, semaphore, owner, repo, ref,
+                        file_info["path"], file_info.get("sha", ""),
+                    )
+                    for file_info in selected_files
+                ]
             )
 
-            # 4. Fetch file contents from raw.githubusercontent.com
+            # gather() preserves input order, so contents stay in priority order
             file_contents: dict[str, str] = {}
             failed_downloads: list[str] = []
-            for file_info in selected_files:
-                path = file_info["path"]
-                raw_url = (
-                    f"{self.RAW_CONTENT_BASE}/{owner}/{repo}"
-                    f"/{default_branch}/{path}"
-                )
-                try:
-                    content_resp = await client.get(raw_url)
-                    if content_resp.status_code == 200:
-                        text = content_resp.text
-                        # Truncate very large individual files
-                        if len(text) > 50_000:
-                            text = text[:50_000] + "\n\n... [truncated]"
-                        file_contents[path] = text
-                    else:
-                        failed_downloads.append(path)
-                except (httpx.TimeoutException, httpx.HTTPError):
+            for path, text in results:
+                if text is None:
                     failed_downloads.append(path)
+                else:
+                    file_contents[path] = text
 
             if not file_contents and not directory_tree:
                 raise GitHubClientError(
@@ -1,8 +1,13 @@
 """LLM-based repository summarizer using OpenAI API."""
 
+import io
 import json
 from openai import AsyncOpenAI, APIError, APITimeoutError
+from pydantic import ValidationError
+from app.models import SummarizeResponse
+from app.services.cache import get_cache, make_cache_key
 from app.services.github_client import RepoData
+from app.utils.json_utils import loads_json
 from app.config import Settings, get_settings
 
 
@@ -16,6 +21,54 @@ Respond with a JSON object containing exactly these fields:
 
 Respond ONLY with the JSON object. Do not wrap it in markdown code fences or add any text outside the JSON."""
 
+# Structured outputs: the API enforces this schema server-side, so replies
+# never need fence stripping.
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "RepoSummary",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "summary": {"type": "string"},
+                "technologies": {"type": "array", "items": {"type": "string"}},
+                "structure": {"type": "string"},
+            },
+            "required": ["summary", "technologies", "structure"],
+            "additionalProperties": False,
+        },
+        "strict": True,
+    },
+}
+
+
+# Shared across requests so the connection pool (and its TLS sessions) is
+# reused. Building the client never awaits, so lazy init is race-free.
+_client: AsyncOpenAI | None = None
+_client_config: tuple[str, float] | None = None
+
+
+def get_openai_client(settings: Settings) -> AsyncOpenAI:
+    """Return the process-wide OpenAI client for the given settings."""
+    global _client, _client_config
+    config = (settings.openai_api_key, settings.openai_request_timeout)
+    if _client is None or _client_config != config:
+        _client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            timeout=settings.openai_request_timeout,
+        )
+        _client_config = config
+    return _client
+
+
+async def close_openai_client() -> None:
+    """Close the shared OpenAI client (called on application shutdown)."""
+    global _client, _client_config
+    if _client is not None:
+        await _client.close()
+    _client = None
+    _client_config = None
+
 
 class SummarizerError(Exception):
     """Error during LLM summarization."""
@@ -29,6 +82,7 @@ class SummarizerError(Exception):
 class Summarizer:
     def __init__(self, settings: Settings | None = None):
         self.settings = settings or get_settings()
+        self.cache = get_cache(self.settings)
 
     def _get_client(self) -> AsyncOpenAI:
         if not self.settings.openai_api_key:
@@ -36,47 +90,54 @@ class Summarizer:
                 "Server misconfiguration: LLM API key not set",
                 status_code=500,
             )
-        return AsyncOpenAI(
-            api_key=self.settings.openai_api_key,
-            timeout=self.settings.openai_request_timeout,
-        )
+        return get_openai_client(self.settings)
 
     def build_user_prompt(self, repo_data: RepoData) -> str:
         """Build the user prompt from repo data."""
-        sections = []
+        # Write straight into one buffer rather than collecting a list of
+        # sections and joining it, which copies every file body twice.
+        buf = io.StringIO()
 
         # Metadata header
-        sections.append(f"# Repository: {repo_data.owner}/{repo_data.repo}")
+        buf.write(f"# Repository: {repo_data.owner}/{repo_data.repo}\n")
         if repo_data.description:
-            sections.append(f"# Description: {repo_data.description}")
-        sections.append(
+            buf.write(f"# Description: {repo_data.description}\n")
+        buf.write(
             f"# Stars: {repo_data.stars} | Forks: {repo_data.forks} "
-            f"| Language: {repo_data.language}"
+            f"| Language: {repo_data.language}\n\n"
         )
-        sections.append("")
 
         # Directory tree
-        sections.append("## Directory Tree")
-        sections.append("```")
-        sections.append(repo_data.directory_tree)
-        sections.append("```")
-        sections.append("")
+        buf.write("## Directory Tree\n```\n")
+        buf.write(repo_data.directory_tree)
+        buf.write("\n```\n\n")
 
         # File contents
-        sections.append("## File Contents")
+        buf.write("## File Contents")
         for path, content in repo_data.file_contents.items():
-            sections.append(f"\n### {path}")
-            sections.append("```")
-            sections.append(content)
-            sections.append("```")
+            buf.write("\n\n### ")
+            buf.write(path)
+            buf.write("\n```\n")
+            buf.write(content)
+            buf.write("\n```")
 
-        return "\n".join(sections)
+        return buf.getvalue()
 
     async def summarize(self, repo_data: RepoData) -> dict:
         """Generate a summary of the repository using OpenAI."""
-        client = self._get_client()
         user_prompt = self.build_user_prompt(repo_data)
 
+        # Exact-match cache: identical prompts always produce a reusable answer
+        cache_key = make_cache_key(
+            "llm", self.settings.openai_model, SYSTEM_PROMPT, user_prompt
+        )
+        if self.cache is not None:
+            cached = await self.cache.aget(cache_key)
+            if cached is not None:
+                return cached
+
+        client = self._get_client()
+
         try:
             response = await client.chat.completions.create(
                 model=self.settings.openai_model,
@@ -85,6 +146,7 @@ class Summarizer:
                     {"role": "user", "content": user_prompt},
                 ],
                 temperature=0.3,
+                response_format=RESPONSE_FORMAT,
             )
         except APITimeoutError:
             raise SummarizerError(
@@ -100,38 +162,29 @@ class Summarizer:
         if not response.choices:
             raise SummarizerError("LLM returned no choices", status_code=502)
 
-        raw_content = response.choices[0].message.content
-        if not raw_content:
+        message = response.choices[0].message
+        if not message.content:
+            if message.refusal:
+                raise SummarizerError(
+                    f"LLM refused to summarize: {message.refusal}",
+                    status_code=502,
+                )
             raise SummarizerError("LLM returned empty response", status_code=502)
 
-        # Strip markdown fences if the LLM added them
-        content = raw_content.strip()
-        if content.startswith("```"):
-            # Remove first line (```json or ```)
-            content = content.split("\n", 1)[1] if "\n" in content else content[3:]
-        if content.endswith("```"):
-            content = content[:-3]
-        content = content.strip()
-
+        # A response cut off by the token limit is not valid JSON, and not
+        # every provider enforces the strict schema, so check the shape here.
+        # Only validated summaries reach the cache, which lets the router
+        # build responses from them with model_construct().
         try:
-            result = json.loads(content)
-        except json.JSONDecodeError:
+            summary = SummarizeResponse.model_validate(
+                loads_json(message.content)
+            ).model_dump()
+        except (json.JSONDecodeError, ValidationError):
             raise SummarizerError(
                 "LLM returned malformed response. Please try again.",
                 status_code=502,
             )
 
-        # Validate required fields
-        required = {"summary", "technologies", "structure"}
-        missing = required - set(result.keys())
-        if missing:
-            raise SummarizerError(
-                f"LLM response missing fields: {missing}",
-                status_code=502,
-            )
-
-        return {
-            "summary": str(result["summary"]),
-            "technologies": list(result["technologies"]),
-            "structure": str(result["structure"]),
-        }
+        if self.cache is not None:
+            await self.cache.aset(cache_key, summary)
+        return summary
@@ -0,0 +1,105 @@
+"""Shrink file contents before they are embedded in the LLM prompt.
+
+Prompt tokens grow linearly with the bytes we send, so comments, function
+docstrings and runs of blank lines are dropped from source files, and very
+large source files are reduced to their imports and signatures.
+
+JavaScript/TypeScript comments are removed with a regex rather than a
+parser. It skips string literals but cannot tell a "//" inside a regex
+literal from a comment, so files that appear to contain a regex literal
+keep their comments (only blank-line runs are collapsed).
+"""
+
+import ast
+import re
+
+PYTHON_EXTENSIONS = frozenset({".py"})
+JS_EXTENSIONS = frozenset({".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs"})
+
+# Source files still larger than this after stripping keep only signatures
+SIGNATURES_ONLY_THRESHOLD = 20_000
+
+_BLANK_RUN_RE = re.compile(r"\n(?:[ \t]*\n){2,}")
+_PY_COMMENT_LINE_RE = re.compile(r"^[ \t]*#.*\n?", re.MULTILINE)
+# String literals are matched (and kept) first so "http://..." survives
+_JS_COMMENT_RE = re.compile(
+    r"""("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)"""
+    r"|/\*.*?\*/|//[^\n]*",
+    re.DOTALL,
+)
+# A /.../ regex literal: a slash in operand position (after an operator,
+# opening bracket, "return" or at line start) closed on the same line.
+# Also matches some comments and divisions; that only skips stripping.
+# The body branches start with disjoint characters, so a failed match
+# cannot backtrack exponentially (e.g. over a long run of "[a]").
+_JS_REGEX_LITERAL_RE = re.compile(
+    r"(?:^|[=(,:\[!&|?{};]|\breturn)[ \t]*"
+    r"/(?![/*])(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/",
+    re.MULTILINE,
+)
+_SIGNATURE_RE = re.compile(
+    r"^[ \t]*(?:export\s+(?:default\s+)?)?(?:async\s+)?"
+    r"(?:def|class|function|import|from)\b.*$",
+    re.MULTILINE,
+)
+
+
+def _extension(path: str) -> str:
+    filename = path.rpartition("/")[2]
+    dot_idx = filename.rfind(".")
+    return filename[dot_idx:].lower() if dot_idx > 0 else ""
+
+
+def _strip_python(text: str) -> str:
+    """Drop comments and class/function docstrings from Python source."""
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError, RecursionError):
+        # Truncated or invalid source: fall back to removing comment lines
+        return _PY_COMMENT_LINE_RE.sub("", text)
+
+    for node in ast.walk(tree):
+        # The module docstring usually describes the project, so keep it
+        if not isinstance(
+            node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+        ):
+            continue
+        first = node.body[0]
+        if (
+            isinstance(first, ast.Expr)
+            and isinstance(first.value, ast.Constant)
+            and isinstance(first.value.value, str)
+        ):
+            node.body = node.body[1:] or [ast.Pass()]
+
+    try:
+        # unparse() never emits comments
+        return ast.unparse(tree)
+    except RecursionError:
+        return _PY_COMMENT_LINE_RE.sub("", text)
+
+
+def _strip_js(text: str) -> str:
+    """Drop // and /* */ comments from JavaScript/TypeScript source."""
+    if _JS_REGEX_LITERAL_RE.search(text):
+        return text  # "//" inside a regex literal would be read as a comment
+    return _JS_COMMENT_RE.sub(lambda m: m.group(1) or "", text)
+
+
+def compress_content(path: str, text: str) -> str:
+    """Return a smaller, prompt-ready version of a file's contents."""
+    ext = _extension(path)
+    is_code = True
+    if ext in PYTHON_EXTENSIONS:
+        text = _strip_python(text)
+    elif ext in JS_EXTENSIONS:
+        text = _strip_js(text)
+    else:
+        is_code = False
+
+    text = _BLANK_RUN_RE.sub("\n\n", text)
+
+    if is_code and len(text) > SIGNATURES_ONLY_THRESHOLD:
+        signatures = "\n".join(m.group(0) for m in _SIGNATURE_RE.finditer(text))
+        text = signatures + "\n\n... [signatures only]"
+    return text
@@ -1,22 +1,40 @@
 """File filtering and priority ranking for GitHub repository analysis."""
 
+from functools import lru_cache
+from itertools import accumulate
+from operator import itemgetter
+
 PRIORITY_TIER1 = 1   # README, top-level docs
 PRIORITY_TIER2 = 2   # Config files, package manifests
 PRIORITY_TIER3 = 3   # Source code files
 PRIORITY_TIER4 = 4   # Test files, docs, examples
 PRIORITY_SKIP = 99   # Should not be fetched
 
+# Relative information value of a file per tier. Beyond Tier 1, the budget is
+# filled by value per byte, so one large config file cannot starve many
+# small source files.
+PRIORITY_VALUES: dict[int, float] = {
+    PRIORITY_TIER1: 10.0,
+    PRIORITY_TIER2: 5.0,
+    PRIORITY_TIER3: 2.0,
+    PRIORITY_TIER4: 1.0,
+}
+
+# Classification is a pure function of the path; repeat requests for the
+# same repo (and the exclusion pass in the GitHub client) hit the caches.
+_CLASSIFY_CACHE_SIZE = 8192
+
 # Directories to completely skip
-EXCLUDED_DIRS: set[str] = {
+EXCLUDED_DIRS: frozenset[str] = frozenset({
     "node_modules", "vendor", ".git", "dist", "build", "__pycache__",
     ".venv", "venv", "env", ".idea", ".vscode", ".tox", ".mypy_cache",
     ".pytest_cache", ".next", ".nuxt", "target", "bin", "obj",
     "coverage", ".coverage", "htmlcov", ".eggs", ".gradle",
     ".terraform", ".serverless",
-}
+})
 
 # File extensions to skip (binary/generated)
-EXCLUDED_EXTENSIONS: set[str] = {
+EXCLUDED_EXTENSIONS: frozenset[str] = frozenset({
     # Images
     ".png", ".jpg", ".jpeg", ".gif", ".ico", ".svg", ".bmp", ".webp",
     # Fonts
@@ -34,22 +52,25 @@ EXCLUDED_EXTENSIONS: set[str] = {
     ".sqlite", ".db",
     # Source maps
     ".map",
-}
+})
 
 # Specific filenames to skip (lock files, generated)
-EXCLUDED_FILENAMES: set[str] = {
+EXCLUDED_FILENAMES: frozenset[str] = frozenset({
     "package-lock.json", "yarn.lock", "poetry.lock", "Cargo.lock",
     "Gemfile.lock", "composer.lock", "go.sum", "pnpm-lock.yaml",
     "npm-shrinkwrap.json", ".DS_Store", "Thumbs.db",
-}
+})
+
+# Generated bundles to skip, matched against the end of the filename
+EXCLUDED_SUFFIXES: tuple[str, ...] = (".min.js", ".min.css")
 
 # Tier 1: README and top-level docs (highest priority)
-TIER1_FILENAMES: set[str] = {
+TIER1_FILENAMES: frozenset[str] = frozenset({
     "README.md", "README.rst", "README.txt", "README",
-}
+})
 
 # Tier 2: Config/manifest files
-TIER2_FILENAMES: set[str] = {
+TIER2_FILENAMES: frozenset[str] = frozenset({
     "package.json", "pyproject.toml", "setup.py", "setup.cfg",
     "Cargo.toml", "go.mod", "pom.xml", "build.gradle", "build.gradle.kts",
     "Makefile", "CMakeLists.txt", "Dockerfile", "docker-compose.yml",
@@ -57,22 +78,23 @@ TIER2_FILENAMES: set[str] = {
     "tsconfig.json", "tox.ini", ".eslintrc.json", ".eslintrc.js",
     "webpack.config.js", "vite.config.ts", "vite.config.js",
     "next.config.js", "next.config.mjs",
-}
+})
 
-# Tier 2: Directory patterns for config files
-TIER2_DIR_PATTERNS: list[str] = [
+# Tier 2: Directory patterns for config files (a tuple, so a single
+# str.startswith call checks them all)
+TIER2_DIR_PATTERNS: tuple[str, ...] = (
     ".github/workflows/",
-]
+)
 
 # Tier 3: Entry point filenames (higher priority within tier 3)
-TIER3_ENTRY_POINTS: set[str] = {
+TIER3_ENTRY_POINTS: frozenset[str] = frozenset({
     "main.py", "app.py", "index.ts", "index.js", "main.ts", "main.js",
     "server.py", "server.ts", "server.js", "main.go", "main.rs",
     "lib.rs", "mod.rs", "index.py",
-}
+})
 
 # Source code extensions
-SOURCE_EXTENSIONS: set[str] = {
+SOURCE_EXTENSIONS: frozenset[str] = frozenset({
     ".py", ".js", ".ts", ".jsx", ".tsx", ".go", ".rs", ".java",
     ".kt", ".rb", ".php", ".c", ".cpp", ".h", ".hpp", ".cs",
     ".swift", ".scala", ".clj", ".ex", ".exs", ".hs", ".lua",
@@ -80,19 +102,61 @@ SOURCE_EXTENSIONS: set[str] = {
     ".yaml", ".yml", ".toml", ".json", ".xml", ".html", ".css",
     ".scss", ".less", ".sql", ".graphql", ".proto", ".tf",
     ".md", ".rst", ".txt",
+})
+
+# Extension sets expanded with all-lowercase and all-uppercase spellings, so
+# the common cases (".py", ".PNG") match without lowercasing every filename.
+_EXCLUDED_EXTENSION_CASES: frozenset[str] = frozenset(
+    e.lower() for e in EXCLUDED_EXTENSIONS
+) | frozenset(e.upper() for e in EXCLUDED_EXTENSIONS)
+_SOURCE_EXTENSION_CASES: frozenset[str] = frozenset(
+    e.lower() for e in SOURCE_EXTENSIONS
+) | frozenset(e.upper() for e in SOURCE_EXTENSIONS)
+
+# Exact filename -> tier for README variants, config files and entry points
+_FILENAME_PRIORITY: dict[str, int] = {
+    **{name: PRIORITY_TIER1 for name in TIER1_FILENAMES},
+    **{name: PRIORITY_TIER2 for name in TIER2_FILENAMES},
+    **{name: PRIORITY_TIER3 for name in TIER3_ENTRY_POINTS},
 }
 
+# Test file suffixes, checked with a single endswith call
+_TEST_SUFFIXES: tuple[str, ...] = (
+    "_test.py", ".test.js", ".test.ts", ".spec.js", ".spec.ts",
+)
 
-def should_exclude_path(path: str) -> bool:
-    """Check if a file path should be excluded from analysis."""
-    parts = path.split("/")
 
-    # Check directory exclusions
-    for part in parts[:-1]:  # All parts except filename
+def _has_extension(
+    ext: str, extensions: frozenset[str], cases: frozenset[str]
+) -> bool:
+    """Case-insensitive membership of `ext` in `extensions`.
+
+    `cases` is the set expanded to lower- and uppercase spellings.
+    """
+    if ext in cases:
+        return True
+    # Only mixed-case extensions (".Png") still need lowercasing
+    return not (ext.islower() or ext.isupper()) and ext.lower() in extensions
+
+
+@lru_cache(maxsize=_CLASSIFY_CACHE_SIZE)
+def _is_excluded_dir(dirname: str) -> bool:
+    """Whether any segment of a directory path is an excluded directory.
+
+    Trees hold far fewer directories than files, and files in the same
+    directory share the answer, so the split runs once per directory.
+    """
+    for part in dirname.split("/"):
         if part in EXCLUDED_DIRS:
             return True
+    return False
+
 
-    filename = parts[-1]
+def _is_excluded(dirname: str, filename: str) -> bool:
+    """Exclusion check for a path already split into dirname and filename."""
+    # Check directory exclusions
+    if dirname and _is_excluded_dir(dirname):
+        return True
 
     # Check excluded filenames
     if filename in EXCLUDED_FILENAMES:
@@ -101,58 +165,46 @@ def should_exclude_path(path: str) -> bool:
     # Check excluded extensions
     dot_idx = filename.rfind(".")
     if dot_idx != -1:
-        ext = filename[dot_idx:].lower()
-        if ext in EXCLUDED_EXTENSIONS:
+        if _has_extension(
+            filename[dot_idx:], EXCLUDED_EXTENSIONS, _EXCLUDED_EXTENSION_CASES
+        ):
             return True
 
-    # Check minified files
-    if filename.endswith(".min.js") or filename.endswith(".min.css"):
-        return True
-
-    # Check chunk files
-    if ".chunk." in filename:
-        return True
+    # Check minified and chunk files
+    return filename.endswith(EXCLUDED_SUFFIXES) or ".chunk." in filename
 
-    return False
 
+def _priority(path: str, filename: str) -> int:
+    """Priority tier for a path whose filename has already been extracted."""
+    # Exact README / config names resolve in one lookup; entry points still
+    # need the directory and test checks below.
+    priority = _FILENAME_PRIORITY.get(filename)
+    if priority is not None and priority != PRIORITY_TIER3:
+        return priority
 
-def get_file_priority(path: str) -> int:
-    """Return priority tier for a file (lower number = higher priority)."""
-    parts = path.split("/")
-    filename = parts[-1]
-
-    # Tier 1: README
-    if filename.upper().startswith("README"):
+    # Tier 1: README (any case; uppercase only the 6-char prefix)
+    if filename[:6].upper() == "README":
         return PRIORITY_TIER1
 
-    # Tier 2: Config/manifest files
-    if filename in TIER2_FILENAMES:
-        return PRIORITY_TIER2
-
     # Tier 2: GitHub workflows and similar config dirs
-    for pattern in TIER2_DIR_PATTERNS:
-        if path.startswith(pattern):
-            return PRIORITY_TIER2
-
-    # Check if it's a source file at all
-    dot_idx = filename.rfind(".")
-    ext = filename[dot_idx:].lower() if dot_idx != -1 else ""
+    if path.startswith(TIER2_DIR_PATTERNS):
+        return PRIORITY_TIER2
 
-    if ext not in SOURCE_EXTENSIONS and filename not in TIER3_ENTRY_POINTS:
-        return PRIORITY_SKIP
+    # Check if it's a source file at all (entry points always are)
+    if priority is None:
+        dot_idx = filename.rfind(".")
+        if dot_idx == -1 or not _has_extension(
+            filename[dot_idx:], SOURCE_EXTENSIONS, _SOURCE_EXTENSION_CASES
+        ):
+            return PRIORITY_SKIP
 
     # Tier 4: Test files (lower priority than regular source)
     lower_path = path.lower()
     if (
         "/test" in lower_path
-        or "/tests" in lower_path
         or "/spec" in lower_path
         or filename.startswith("test_")
-        or filename.endswith("_test.py")
-        or filename.endswith(".test.js")
-        or filename.endswith(".test.ts")
-        or filename.endswith(".spec.js")
-        or filename.endswith(".spec.ts")
+        or filename.endswith(_TEST_SUFFIXES)
     ):
         return PRIORITY_TIER4
 
@@ -160,47 +212,112 @@ def get_file_priority(path: str) -> int:
     return PRIORITY_TIER3
 
 
-def _sort_key(file_info: dict) -> tuple:
-    """Sort key: (priority, depth, size). Shallower and smaller files first."""
-    path = file_info["path"]
-    priority = get_file_priority(path)
-    depth = path.count("/")
-    size = file_info.get("size", 0)
-    # Entry points get a slight boost within their tier
-    filename = path.split("/")[-1]
+@lru_cache(maxsize=_CLASSIFY_CACHE_SIZE)
+def should_exclude_path(path: str) -> bool:
+    """Check if a file path should be excluded from analysis."""
+    dirname, _, filename = path.rpartition("/")
+    return _is_excluded(dirname, filename)
+
+
+@lru_cache(maxsize=_CLASSIFY_CACHE_SIZE)
+def get_file_priority(path: str) -> int:
+    """Return priority tier for a file (lower number = higher priority)."""
+    return _priority(path, path.rpartition("/")[2])
+
+
+@lru_cache(maxsize=_CLASSIFY_CACHE_SIZE)
+def _classify_included(path: str) -> tuple[bool, int, int, int]:
+    """Return (False, priority, is_entry, depth) for a path known not excluded.
+
+    Entry points get a slight boost within their tier (is_entry 0 sorts
+    first); shallower files sort before deeper ones.
+    """
+    filename = path.rpartition("/")[2]
     is_entry = 0 if filename in TIER3_ENTRY_POINTS else 1
-    return (priority, is_entry, depth, size)
+    return False, _priority(path, filename), is_entry, path.count("/")
+
+
+@lru_cache(maxsize=_CLASSIFY_CACHE_SIZE)
+def _classify(path: str) -> tuple[bool, int, int, int]:
+    """Return (excluded, priority, is_entry, depth) for a path in one pass."""
+    dirname, _, filename = path.rpartition("/")
+    if _is_excluded(dirname, filename):
+        return True, PRIORITY_SKIP, 1, 0
+    return _classify_included(path)
+
+
+# Ranking records are plain tuples (priority, is_entry, depth, size, index,
+# file): exact tuples take list.sort's fast comparison path, which a
+# NamedTuple subclass loses, and they are cheaper to build.
+_get_size = itemgetter(3)
+_get_file = itemgetter(5)
 
 
 def rank_and_select_files(
-    files: list[dict], max_chars: int
+    files: list[dict], max_chars: int, *, prefiltered: bool = False
 ) -> list[dict]:
     """Rank files by priority and select within character budget.
 
+    Tier-1 files (READMEs) are taken first. The rest of the budget is
+    filled greedily by value per byte (see PRIORITY_VALUES). The selection
+    is returned in rank order.
+
     Args:
         files: List of dicts with "path" and "size" keys.
         max_chars: Maximum total characters to select.
+        prefiltered: The caller already dropped paths rejected by
+            should_exclude_path, so the exclusion check is skipped.
 
     Returns:
         Ordered list of file dicts to fetch, within budget.
     """
-    # Filter out excluded files
-    eligible = [f for f in files if not should_exclude_path(f["path"])]
-
-    # Filter out files with non-source extensions that aren't config
-    eligible = [f for f in eligible if get_file_priority(f["path"]) != PRIORITY_SKIP]
-
-    # Sort by priority
-    eligible.sort(key=_sort_key)
+    # Classify every file once, keeping only fetchable ones. Tuples sort as
+    # (priority, is_entry, depth, size); the index keeps ties in input order
+    # and stops the comparison before it reaches the dict.
+    classify = _classify_included if prefiltered else _classify
+    annotated = []
+    total_size = 0
+    for index, f in enumerate(files):
+        excluded, priority, is_entry, depth = classify(f["path"])
+        if excluded or priority == PRIORITY_SKIP:
+            continue
+        size = f.get("size", 0)
+        total_size += size
+        annotated.append((priority, is_entry, depth, size, index, f))
+    annotated.sort()
+
+    # Everything fits (the common case for small repos): no selection needed
+    if total_size <= max_chars:
+        return list(map(_get_file, annotated))
+
+    # Tier 1 in rank order, then everything else by descending value per
+    # byte, ties broken by rank.
+    order = [i for i, a in enumerate(annotated) if a[0] == PRIORITY_TIER1]
+    order += [
+        i for _, i in sorted(
+            (-PRIORITY_VALUES[a[0]] / max(a[3], 1), i)
+            for i, a in enumerate(annotated)
+            if a[0] != PRIORITY_TIER1
+        )
+    ]
+
+    # Smallest size at or after each position: once even that no longer
+    # fits, nothing later can be selected and the scan stops early.
+    sizes = list(map(_get_size, annotated))
+    min_remaining = list(accumulate(reversed([sizes[i] for i in order]), min))
+    min_remaining.reverse()
 
     # Select within budget
-    selected = []
+    chosen: list[int] = []
     total_chars = 0
-    for f in eligible:
-        estimated_chars = f.get("size", 0)
-        if total_chars + estimated_chars > max_chars and selected:
+    for pos, i in enumerate(order):
+        estimated_chars = sizes[i]
+        if total_chars + estimated_chars > max_chars and chosen:
+            if total_chars + min_remaining[pos] > max_chars:
+                break
             continue  # Skip but keep trying smaller files
-        selected.append(f)
+        chosen.append(i)
         total_chars += estimated_chars
 
-    return selected
+    chosen.sort()
+    return [annotated[i][5] for i in chosen]
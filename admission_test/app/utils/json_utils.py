@@ -0,0 +1,19 @@
+"""Fast JSON parsing with a stdlib fallback."""
+
+import json
+from typing import Any
+
+import orjson
+
+
+def loads_json(data: bytes | str) -> Any:
+    """Parse JSON with orjson, falling back to the stdlib parser.
+
+    orjson is several times faster on large payloads (multi-megabyte GitHub
+    trees) but stricter, e.g. it rejects NaN, so retry with json on failure.
+    Raises json.JSONDecodeError (a ValueError) if neither can parse it.
+    """
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return json.loads(data)
@@ -0,0 +1,102 @@
+"""Concurrency limiting that adapts to GitHub's rate-limit headers."""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Mapping
+
+
+class AdaptiveSemaphore:
+    """A semaphore whose capacity shrinks as rate-limit headroom runs out.
+
+    Call update() with each response's headers. Once X-RateLimit-Remaining
+    drops below `low_watermark` the capacity shrinks to `low_capacity`;
+    below `critical_watermark` it drops to 1, and acquire() waits for the
+    window to reset if that is at most `max_wait` seconds away. Responses
+    without rate-limit headers leave the limiter unchanged.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 16,
+        low_capacity: int = 4,
+        low_watermark: int = 50,
+        critical_watermark: int = 10,
+        max_wait: float = 30.0,
+    ):
+        self.max_capacity = capacity
+        self.capacity = capacity
+        self.low_capacity = low_capacity
+        self.low_watermark = low_watermark
+        self.critical_watermark = critical_watermark
+        self.max_wait = max_wait
+        self.remaining: int | None = None
+        self.reset_at: float | None = None
+        self._in_use = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        # Wait before taking a slot so the sleep does not block other callers
+        if self.remaining is not None and self.remaining < self.critical_watermark:
+            await self._wait_for_reset()
+
+        while self._in_use >= self.capacity:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif not waiter.cancelled():
+                    self._wake()  # Pass on a wake-up we can no longer use
+                raise
+        self._in_use += 1
+
+    def release(self) -> None:
+        self._in_use -= 1
+        self._wake()
+
+    async def __aenter__(self) -> "AdaptiveSemaphore":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """Adjust capacity from a response's X-RateLimit-* headers."""
+        remaining = headers.get("x-ratelimit-remaining")
+        if not isinstance(remaining, str) or not remaining.isdigit():
+            return  # e.g. raw.githubusercontent.com sends no rate-limit headers
+        self.remaining = int(remaining)
+        reset = headers.get("x-ratelimit-reset")
+        if isinstance(reset, str) and reset.isdigit():
+            self.reset_at = float(reset)
+
+        if self.remaining < self.critical_watermark:
+            self.capacity = 1
+        elif self.remaining < self.low_watermark:
+            self.capacity = min(self.low_capacity, self.max_capacity)
+        else:
+            self.capacity = self.max_capacity
+        self._wake()
+
+    def _wake(self) -> None:
+        # Woken waiters re-check capacity in acquire(), so over-waking is safe
+        free = self.capacity - self._in_use
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    async def _wait_for_reset(self) -> None:
+        if self.reset_at is None:
+            return
+        delay = self.reset_at - time.time()
+        # A partial wait neither prevents the 403 nor saves quota, so for a
+        # distant reset proceed at once and let GitHub's 403 surface as a
+        # 429 to the caller
+        if 0 < delay <= self.max_wait:
+            await asyncio.sleep(delay)
@@ -1,27 +1,57 @@
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI
+from app.config import get_settings
 from app.routers import health, summarize
+from app.services.github_client import create_http_client, create_rate_limiter
+from app.services.llm_summarizer import close_openai_client
+
+
+_DOTENV_LOADED = False
 
 
 def _load_dotenv():
     """Load .env file if it exists (lightweight, no extra dependency)."""
+    global _DOTENV_LOADED
+    if _DOTENV_LOADED:
+        return
+    _DOTENV_LOADED = True
+
     env_path = Path(__file__).resolve().parent / ".env"
-    if env_path.exists():
-        with open(env_path) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#") and "=" in line:
-                    key, _, value = line.partition("=")
-                    os.environ.setdefault(key.strip(), value.strip())
+    try:
+        text = env_path.read_text()
+    except FileNotFoundError:
+        return
+
+    lines = (line.strip() for line in text.splitlines())
+    for line in lines:
+        if line and not line.startswith("#") and "=" in line:
+            key, _, value = line.partition("=")
+            os.environ.setdefault(key.strip(), value.strip())
 
 
 _load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled HTTP client and rate limiter for all GitHub traffic
+    settings = get_settings()
+    app.state.http_client = create_http_client(settings)
+    app.state.github_limiter = create_rate_limiter(settings)
+    try:
+        yield
+    finally:
+        await app.state.http_client.aclose()
+        await close_openai_client()
+
+
 app = FastAPI(
     title="GitHub Repo Summarizer",
     description="Summarize GitHub repositories using LLM",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.include_router(health.router)
@@ -1,7 +1,11 @@
+import asyncio
+import httpx
+import pytest
 from unittest.mock import AsyncMock, patch
 from fastapi.testclient import TestClient
 from main import app
-from app.services.github_client import RepoData
+from app.config import Settings
+from app.services.github_client import GitHubClient, RepoData
 
 client = TestClient(app)
 
@@ -13,6 +17,15 @@ class TestHealthCheck:
         assert response.json() == {"status": "ok"}
 
 
+class TestLifespan:
+    def test_shared_http_client_lifecycle(self):
+        with TestClient(app):
+            http_client = app.state.http_client
+            assert isinstance(http_client, httpx.AsyncClient)
+            assert not http_client.is_closed
+        assert http_client.is_closed
+
+
 class TestSummarizeEndpointValidation:
     def test_invalid_url_returns_422(self):
         response = client.post("/summarize", json={"github_url": "not-a-url"})
@@ -87,3 +100,192 @@ class TestSummarizeEndpointIntegration:
 
         assert response.status_code == 404
         assert "not found" in response.json()["message"]
+
+    def test_url_variants_share_cached_summary(self, tmp_path):
+        mock_repo_data = RepoData(
+            owner="psf",
+            repo="requests",
+            description="Python HTTP library",
+            stars=50000,
+            forks=9000,
+            language="Python",
+            default_branch="main",
+            directory_tree="README.md",
+            file_contents={"README.md": "# Requests"},
+        )
+        mock_llm_result = {
+            "summary": "Requests is an HTTP library.",
+            "technologies": ["Python"],
+            "structure": "Simple layout.",
+        }
+
+        with patch(
+            "app.routers.summarize.get_settings",
+            return_value=Settings(cache_dir=str(tmp_path)),
+        ), patch(
+            "app.routers.summarize.GitHubClient"
+        ) as MockGHClient, patch(
+            "app.routers.summarize.Summarizer"
+        ) as MockSummarizer:
+            mock_gh = MockGHClient.return_value
+            mock_gh.parse_github_url.side_effect = GitHubClient.parse_github_url
+            mock_gh.resolve_head_sha = AsyncMock(return_value="abc123")
+            mock_gh.fetch_repo_data = AsyncMock(return_value=mock_repo_data)
+
+            mock_sum = MockSummarizer.return_value
+            mock_sum.summarize = AsyncMock(return_value=mock_llm_result)
+
+            first = client.post(
+                "/summarize",
+                json={"github_url": "https://github.com/psf/requests"},
+            )
+            second = client.post(
+                "/summarize",
+                json={"github_url": "https://github.com/PSF/Requests.git"},
+            )
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert second.json() == first.json()
+        # The pipeline reads the same commit the cache key was built from
+        mock_gh.fetch_repo_data.assert_awaited_once_with(
+            "psf", "requests", ref="abc123"
+        )
+        mock_sum.summarize.assert_awaited_once()
+
+    def test_changed_model_misses_cached_summary(self, tmp_path):
+        mock_repo_data = RepoData(
+            owner="psf",
+            repo="requests",
+            description="Python HTTP library",
+            stars=50000,
+            forks=9000,
+            language="Python",
+            default_branch="main",
+            directory_tree="README.md",
+            file_contents={"README.md": "# Requests"},
+        )
+        mock_llm_result = {
+            "summary": "Requests is an HTTP library.",
+            "technologies": ["Python"],
+            "structure": "Simple layout.",
+        }
+
+        with patch(
+            "app.routers.summarize.get_settings"
+        ) as mock_settings, patch(
+            "app.routers.summarize.GitHubClient"
+        ) as MockGHClient, patch(
+            "app.routers.summarize.Summarizer"
+        ) as MockSummarizer:
+            mock_gh = MockGHClient.return_value
+            mock_gh.parse_github_url.side_effect = GitHubClient.parse_github_url
+            mock_gh.resolve_head_sha = AsyncMock(return_value="abc123")
+            mock_gh.fetch_repo_data = AsyncMock(return_value=mock_repo_data)
+
+            mock_sum = MockSummarizer.return_value
+            mock_sum.summarize = AsyncMock(return_value=mock_llm_result)
+
+            for model in ("gpt-4o-mini", "gpt-4o"):
+                mock_settings.return_value = Settings(
+                    cache_dir=str(tmp_path), openai_model=model
+                )
+                response = client.post(
+                    "/summarize",
+                    json={"github_url": "https://github.com/psf/requests"},
+                )
+                assert response.status_code == 200
+
+        assert mock_sum.summarize.await_count == 2
+
+
+
+@pytest.mark.asyncio
+class TestSummarizeDeduplication:
+    async def test_concurrent_requests_share_one_pipeline(self):
+        mock_repo_data = RepoData(
+            owner="psf",
+            repo="requests",
+            description="Python HTTP library",
+            stars=50000,
+            forks=9000,
+            language="Python",
+            default_branch="main",
+            directory_tree="README.md",
+            file_contents={"README.md": "# Requests"},
+        )
+        mock_llm_result = {
+            "summary": "Requests is an HTTP library.",
+            "technologies": ["Python"],
+            "structure": "Simple layout.",
+        }
+
+        async def slow_fetch(owner, repo, ref="HEAD"):
+            await asyncio.sleep(0.05)
+            return mock_repo_data
+
+        with patch(
+            "app.routers.summarize.GitHubClient"
+        ) as MockGHClient, patch(
+            "app.routers.summarize.Summarizer"
+        ) as MockSummarizer:
+            mock_gh = MockGHClient.return_value
+            mock_gh.parse_github_url.side_effect = GitHubClient.parse_github_url
+            mock_gh.fetch_repo_data = AsyncMock(side_effect=slow_fetch)
+
+            mock_sum = MockSummarizer.return_value
+            mock_sum.summarize = AsyncMock(return_value=mock_llm_result)
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as async_client:
+                responses = await asyncio.gather(
+                    *[
+                        async_client.post(
+                            "/summarize",
+                            json={"github_url": "https://github.com/psf/requests"},
+                        )
+                        for _ in range(5)
+                    ]
+                )
+
+        assert all(r.status_code == 200 for r in responses)
+        mock_gh.fetch_repo_data.assert_awaited_once()
+        mock_sum.summarize.assert_awaited_once()
+
+    async def test_cancelled_leader_does_not_fail_followers(self):
+        from app.routers.summarize import _inflight, _run_deduplicated
+
+        mock_llm_result = {
+            "summary": "Requests is an HTTP library.",
+            "technologies": ["Python"],
+            "structure": "Simple layout.",
+        }
+        release = asyncio.Event()
+
+        async def slow_fetch(owner, repo, ref="HEAD"):
+            await release.wait()
+            return None
+
+        mock_gh = AsyncMock()
+        mock_gh.fetch_repo_data = AsyncMock(side_effect=slow_fetch)
+        mock_sum = AsyncMock()
+        mock_sum.summarize = AsyncMock(return_value=mock_llm_result)
+        args = (mock_gh, mock_sum, "psf", "requests", "HEAD", None, None)
+
+        leader = asyncio.create_task(_run_deduplicated(*args))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(_run_deduplicated(*args))
+        await asyncio.sleep(0)
+
+        # The first caller disconnects while the pipeline is still running
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        release.set()
+
+        assert await follower == mock_llm_result
+        mock_gh.fetch_repo_data.assert_awaited_once()
+        await asyncio.sleep(0)
+        assert ("psf", "requests") not in _inflight
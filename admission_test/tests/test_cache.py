@@ -0,0 +1,36 @@
+import asyncio
+from unittest.mock import patch
+from app.config import Settings
+from app.services.cache import get_cache, make_cache_key
+
+
+class TestMakeCacheKey:
+    def test_stable(self):
+        assert make_cache_key("a", "b") == make_cache_key("a", "b")
+
+    def test_parts_are_separated(self):
+        assert make_cache_key("ab", "c") != make_cache_key("a", "bc")
+
+
+class TestResponseCache:
+    def test_disabled_without_cache_dir(self):
+        assert get_cache(Settings()) is None
+
+    def test_roundtrip(self, tmp_path):
+        cache = get_cache(Settings(cache_dir=str(tmp_path)))
+        assert cache.get("missing") is None
+        cache.set("key", {"summary": "A library", "technologies": ["Python"]})
+        assert cache.get("key") == {
+            "summary": "A library",
+            "technologies": ["Python"],
+        }
+
+    async def test_async_roundtrip_runs_off_the_event_loop(self, tmp_path):
+        cache = get_cache(Settings(cache_dir=str(tmp_path)))
+        with patch(
+            "app.services.cache.asyncio.to_thread", wraps=asyncio.to_thread
+        ) as to_thread:
+            assert await cache.aget("missing") is None
+            await cache.aset("key", {"summary": "A library"})
+            assert await cache.aget("key") == {"summary": "A library"}
+        assert to_thread.call_count == 3
@@ -0,0 +1,74 @@
+import time
+from app.utils.content_compressor import (
+    SIGNATURES_ONLY_THRESHOLD,
+    compress_content,
+)
+
+
+class TestCompressPython:
+    def test_strips_comments_and_function_docstrings(self):
+        source = (
+            '"""Module docstring."""\n'
+            "import os\n"
+            "# a comment\n"
+            "def f(x):\n"
+            '    """Function docstring."""\n'
+            "    return x  # trailing\n"
+        )
+        result = compress_content("pkg/mod.py", source)
+        assert "Module docstring." in result
+        assert "Function docstring." not in result
+        assert "comment" not in result
+        assert "trailing" not in result
+        assert "def f(x):" in result
+
+    def test_invalid_source_falls_back_to_comment_lines(self):
+        source = "# header\ndef f(:\n    pass\n"
+        assert compress_content("broken.py", source) == "def f(:\n    pass\n"
+
+    def test_large_file_keeps_only_signatures(self):
+        body = "    value = 1\n" * (SIGNATURES_ONLY_THRESHOLD // 10)
+        source = f"import os\n\ndef big():\n{body}\nclass Thing:\n    pass\n"
+        result = compress_content("big.py", source)
+        assert result.splitlines()[:3] == ["import os", "def big():", "class Thing:"]
+        assert result.endswith("... [signatures only]")
+
+
+class TestCompressJavaScript:
+    def test_strips_comments_but_keeps_strings(self):
+        source = (
+            "// header\n"
+            'const url = "http://example.com"; /* block */\n'
+            "const s = 'not // a comment';\n"
+        )
+        result = compress_content("src/index.js", source)
+        assert "header" not in result
+        assert "block" not in result
+        assert '"http://example.com"' in result
+        assert "'not // a comment'" in result
+
+    def test_regex_literal_disables_comment_stripping(self):
+        source = "const re = /https?:\\/\\//; const x = 1; // note\n"
+        assert compress_content("src/url.js", source) == source
+
+    def test_division_still_strips_comments(self):
+        source = "const half = total / 2; // note\nconst q = a / b / c;\n"
+        assert compress_content("src/math.js", source) == (
+            "const half = total / 2; \nconst q = a / b / c;\n"
+        )
+
+    def test_unclosed_regex_with_many_classes_is_fast(self):
+        source = "x = /" + "[a]" * 5000 + "\n// note\n"
+        start = time.perf_counter()
+        assert compress_content("src/evil.js", source) == (
+            "x = /" + "[a]" * 5000 + "\n\n"
+        )
+        assert time.perf_counter() - start < 1.0
+
+
+class TestCompressOther:
+    def test_markdown_only_collapses_blank_lines(self):
+        source = "# Title\n\n\n\nSome text\n# Not a comment"
+        assert compress_content("README.md", source) == (
+            "# Title\n\nSome text\n# Not a comment"
+        )
@@ -6,6 +6,7 @@ from app.utils.file_filter import (
     PRIORITY_TIER1,
     PRIORITY_TIER2,
     PRIORITY_TIER3,
+    PRIORITY_TIER4,
     PRIORITY_SKIP,
 )
 
@@ -36,6 +37,12 @@ class TestShouldExcludePath:
         assert should_exclude_path("images/logo.png") is True
         assert should_exclude_path("fonts/arial.woff2") is True
 
+    def test_extension_match_is_case_insensitive(self):
+        assert should_exclude_path("images/LOGO.PNG") is True
+        assert should_exclude_path("images/logo.Png") is True
+        assert get_file_priority("src/App.PY") == PRIORITY_TIER3
+        assert get_file_priority("src/App.Py") == PRIORITY_TIER3
+
     def test_excludes_lock_files(self):
         assert should_exclude_path("package-lock.json") is True
         assert should_exclude_path("poetry.lock") is True
@@ -79,6 +86,17 @@ class TestGetFilePriority:
         p2 = get_file_priority("tests/test_app.py")
         assert p2 > p1  # Higher number = lower priority
 
+    def test_test_file_patterns_are_tier4(self):
+        for path in (
+            "src/Tests/helpers.py",
+            "app/spec/models.rb",
+            "test_app.py",
+            "pkg/app_test.py",
+            "web/app.test.ts",
+            "web/app.spec.js",
+        ):
+            assert get_file_priority(path) == PRIORITY_TIER4, path
+
 
 class TestRankAndSelectFiles:
     def test_selects_within_budget(self):
@@ -120,3 +138,62 @@ class TestRankAndSelectFiles:
         selected = rank_and_select_files(files, max_chars=10000)
         paths = [f["path"] for f in selected]
         assert "node_modules/foo.js" not in paths
+
+    def test_prefiltered_skips_exclusion_check(self):
+        files = [
+            {"path": "README.md", "size": 100},
+            {"path": "node_modules/foo.js", "size": 100},
+        ]
+        selected = rank_and_select_files(files, max_chars=10000, prefiltered=True)
+        assert [f["path"] for f in selected] == ["README.md", "node_modules/foo.js"]
+
+    def test_entry_points_before_other_source_files(self):
+        files = [
+            {"path": "src/utils.py", "size": 10},
+            {"path": "src/deep/main.py", "size": 500},
+            {"path": "src/app.py", "size": 10},
+        ]
+        selected = rank_and_select_files(files, max_chars=10000)
+        assert [f["path"] for f in selected] == [
+            "src/app.py",
+            "src/deep/main.py",
+            "src/utils.py",
+        ]
+
+    def test_keeps_trying_smaller_files_after_budget_overflow(self):
+        files = [
+            {"path": "README.md", "size": 400},
+            {"path": "package.json", "size": 900},
+            {"path": "src/app.py", "size": 500},
+            {"path": "src/utils.py", "size": 100},
+        ]
+        selected = rank_and_select_files(files, max_chars=1000)
+        assert [f["path"] for f in selected] == [
+            "README.md",
+            "src/app.py",
+            "src/utils.py",
+        ]
+
+    def test_large_config_does_not_starve_small_sources(self):
+        files = [
+            {"path": "README.md", "size": 100},
+            {"path": "package.json", "size": 5000},
+            {"path": "src/a.py", "size": 1000},
+            {"path": "src/b.py", "size": 1000},
+            {"path": "src/c.py", "size": 1000},
+        ]
+        selected = rank_and_select_files(files, max_chars=5200)
+        assert [f["path"] for f in selected] == [
+            "README.md",
+            "src/a.py",
+            "src/b.py",
+            "src/c.py",
+        ]
+
+    def test_readme_kept_even_when_over_budget(self):
+        files = [
+            {"path": "src/app.py", "size": 10},
+            {"path": "README.md", "size": 5000},
+        ]
+        selected = rank_and_select_files(files, max_chars=1000)
+        assert [f["path"] for f in selected] == ["README.md"]
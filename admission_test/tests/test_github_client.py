@@ -1,9 +1,28 @@
+import asyncio
+import json
 import pytest
 import httpx
 from unittest.mock import AsyncMock, patch, MagicMock
+from app.config import Settings
 from app.services.github_client import GitHubClient, RepoData
 
 
+def _stream_response(status_code: int, body: bytes) -> MagicMock:
+    """Mimic the async context manager returned by httpx.AsyncClient.stream()."""
+    response = MagicMock()
+    response.status_code = status_code
+
+    async def aiter_bytes(chunk_size=8192):
+        for i in range(0, len(body), chunk_size):
+            yield body[i : i + chunk_size]
+
+    response.aiter_bytes = aiter_bytes
+    stream_ctx = MagicMock()
+    stream_ctx.__aenter__ = AsyncMock(return_value=response)
+    stream_ctx.__aexit__ = AsyncMock(return_value=False)
+    return stream_ctx
+
+
 class TestParseGithubUrl:
     def test_standard_url(self):
         client = GitHubClient()
@@ -17,6 +36,12 @@ class TestParseGithubUrl:
         assert owner == "psf"
         assert repo == "requests"
 
+    def test_dot_git_suffix(self):
+        client = GitHubClient()
+        owner, repo = client.parse_github_url("https://github.com/psf/requests.git")
+        assert owner == "psf"
+        assert repo == "requests"
+
 
 class TestBuildDirectoryTree:
     def test_simple_tree(self):
@@ -40,40 +65,33 @@ class TestFetchRepoData:
 
         mock_repo_response = MagicMock()
         mock_repo_response.status_code = 200
-        mock_repo_response.json.return_value = {
+        mock_repo_response.content = json.dumps({
             "default_branch": "main",
             "description": "Python HTTP library",
             "stargazers_count": 50000,
             "forks_count": 9000,
             "language": "Python",
-        }
+        }).encode()
 
         mock_tree_response = MagicMock()
         mock_tree_response.status_code = 200
-        mock_tree_response.json.return_value = {
+        mock_tree_response.content = json.dumps({
             "tree": [
                 {"path": "README.md", "type": "blob", "size": 5000},
                 {"path": "src", "type": "tree"},
                 {"path": "src/main.py", "type": "blob", "size": 2000},
             ],
             "truncated": False,
-        }
-
-        mock_content_readme = MagicMock()
-        mock_content_readme.status_code = 200
-        mock_content_readme.text = "# Requests\nHTTP library"
-
-        mock_content_main = MagicMock()
-        mock_content_main.status_code = 200
-        mock_content_main.text = "import http\n\ndef get(url): ..."
+        }).encode()
 
         mock_client = AsyncMock()
         mock_client.get = AsyncMock(
+            side_effect=[mock_repo_response, mock_tree_response]
+        )
+        mock_client.stream = MagicMock(
             side_effect=[
-                mock_repo_response,
-                mock_tree_response,
-                mock_content_readme,
-                mock_content_main,
+                _stream_response(200, b"# Requests\nHTTP library"),
+                _stream_response(206, b"import http\n\ndef get(url): ..."),
             ]
         )
         mock_client.__aenter__ = AsyncMock(return_value=mock_client)
@@ -86,3 +104,189 @@ class TestFetchRepoData:
         assert repo_data.repo == "requests"
         assert repo_data.description == "Python HTTP library"
         assert len(repo_data.directory_tree) > 0
+        # Source files are compressed (re-rendered from the AST) for the LLM
+        assert repo_data.file_contents == {
+            "README.md": "# Requests\nHTTP library",
+            "src/main.py": "import http\n\ndef get(url):\n    ...",
+        }
+
+        tree_url = mock_client.get.call_args_list[1].args[0]
+        assert "/git/trees/HEAD?recursive=1" in tree_url
+
+    async def test_falls_back_to_default_branch_tree(self):
+        client = GitHubClient()
+
+        mock_repo_response = MagicMock()
+        mock_repo_response.status_code = 200
+        mock_repo_response.content = json.dumps({"default_branch": "develop"}).encode()
+
+        mock_head_tree_response = MagicMock()
+        mock_head_tree_response.status_code = 404
+
+        mock_tree_response = MagicMock()
+        mock_tree_response.status_code = 200
+        mock_tree_response.content = json.dumps({
+            "tree": [{"path": "README.md", "type": "blob", "size": 10}],
+        }).encode()
+
+        mock_client = AsyncMock()
+        mock_client.get = AsyncMock(
+            side_effect=[
+                mock_repo_response,
+                mock_head_tree_response,
+                mock_tree_response,
+            ]
+        )
+        mock_client.stream = MagicMock(
+            return_value=_stream_response(200, b"# Project")
+        )
+        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
+        mock_client.__aexit__ = AsyncMock(return_value=False)
+
+        with patch("httpx.AsyncClient", return_value=mock_client):
+            repo_data = await client.fetch_repo_data("foo", "bar")
+
+        fallback_url = mock_client.get.call_args_list[2].args[0]
+        assert "/git/trees/develop?recursive=1" in fallback_url
+        assert repo_data.file_contents == {"README.md": "# Project"}
+
+    async def test_oversized_files_listed_but_not_fetched(self):
+        client = GitHubClient(Settings(max_file_size_bytes=1000))
+
+        mock_repo_response = MagicMock()
+        mock_repo_response.status_code = 200
+        mock_repo_response.content = json.dumps({"default_branch": "main"}).encode()
+
+        mock_tree_response = MagicMock()
+        mock_tree_response.status_code = 200
+        mock_tree_response.content = json.dumps({
+            "tree": [
+                {"path": "README.md", "type": "blob", "size": 10},
+                {"path": "data", "type": "tree"},
+                {"path": "data/huge.json", "type": "blob", "size": 5000},
+            ],
+        }).encode()
+
+        mock_client = AsyncMock()
+        mock_client.get = AsyncMock(
+            side_effect=[mock_repo_response, mock_tree_response]
+        )
+        mock_client.stream = MagicMock(
+            return_value=_stream_response(200, b"# Project")
+        )
+        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
+        mock_client.__aexit__ = AsyncMock(return_value=False)
+
+        with patch("httpx.AsyncClient", return_value=mock_client):
+            repo_data = await client.fetch_repo_data("foo", "bar")
+
+        assert repo_data.file_contents == {"README.md": "# Project"}
+        assert repo_data.directory_tree == "README.md\ndata/\n  huge.json"
+        mock_client.stream.assert_called_once()
+
+    async def test_without_metadata_uses_single_api_call(self):
+        client = GitHubClient(Settings(include_repo_metadata=False))
+
+        mock_tree_response = MagicMock()
+        mock_tree_response.status_code = 200
+        mock_tree_response.content = json.dumps({
+            "tree": [{"path": "README.md", "type": "blob", "size": 10}],
+        }).encode()
+
+        mock_client = AsyncMock()
+        mock_client.get = AsyncMock(return_value=mock_tree_response)
+        mock_client.stream = MagicMock(
+            return_value=_stream_response(200, b"# Project")
+        )
+        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
+        mock_client.__aexit__ = AsyncMock(return_value=False)
+
+        with patch("httpx.AsyncClient", return_value=mock_client):
+            repo_data = await client.fetch_repo_data("foo", "bar")
+
+        mock_client.get.assert_awaited_once()
+        raw_url = mock_client.stream.call_args.args[1]
+        assert raw_url == "https://raw.githubusercontent.com/foo/bar/HEAD/README.md"
+        assert repo_data.file_contents == {"README.md": "# Project"}
+        assert repo_data.stars == 0
+
+    async def test_pinned_ref_used_for_tree_and_raw_files(self):
+        client = GitHubClient(Settings(include_repo_metadata=False))
+
+        mock_tree_response = MagicMock()
+        mock_tree_response.status_code = 200
+        mock_tree_response.content = json.dumps({
+            "tree": [{"path": "README.md", "type": "blob", "size": 10}],
+        }).encode()
+
+        mock_client = AsyncMock()
+        mock_client.get = AsyncMock(return_value=mock_tree_response)
+        mock_client.stream = MagicMock(
+            return_value=_stream_response(200, b"# Project")
+        )
+        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
+        mock_client.__aexit__ = AsyncMock(return_value=False)
+
+        with patch("httpx.AsyncClient", return_value=mock_client):
+            await client.fetch_repo_data("foo", "bar", ref="abc123")
+
+        tree_url = mock_client.get.call_args.args[0]
+        assert "/git/trees/abc123?recursive=1" in tree_url
+        raw_url = mock_client.stream.call_args.args[1]
+        assert raw_url == "https://raw.githubusercontent.com/foo/bar/abc123/README.md"
+
+
+@pytest.mark.asyncio
+class TestFetchFile:
+    async def test_truncates_to_max_file_chars(self):
+        client = GitHubClient(Settings(max_file_chars=10))
+        mock_http = MagicMock()
+        mock_http.stream = MagicMock(
+            return_value=_stream_response(200, b"x" * 10_000)
+        )
+
+        path, text = await client._fetch_file(
+            mock_http, asyncio.Semaphore(1), "psf", "requests", "main", "big.py"
+        )
+
+        assert path == "big.py"
+        assert text == "x" * 10 + "\n\n... [truncated]"
+        headers = mock_http.stream.call_args.kwargs["headers"]
+        assert headers["Range"] == "bytes=0-10"
+
+    async def test_cached_blob_skips_download(self, tmp_path):
+        client = GitHubClient(Settings(cache_dir=str(tmp_path)))
+        mock_http = MagicMock()
+        mock_http.stream = MagicMock(
+            return_value=_stream_response(200, b"# comment\nx = 1\n")
+        )
+
+        args = (mock_http, asyncio.Semaphore(1), "psf", "requests", "main", "a.py")
+        first = await client._fetch_file(*args, sha="abc123")
+        second = await client._fetch_file(*args, sha="abc123")
+
+        assert first == second == ("a.py", "x = 1")
+        mock_http.stream.assert_called_once()
+
+    async def test_binary_content_returns_none(self):
+        client = GitHubClient()
+        body = b"\x89PNG\r\n\x1a\n\x00\x00" + b"\xff" * 100_000
+        mock_http = MagicMock()
+        mock_http.stream = MagicMock(return_value=_stream_response(200, body))
+
+        _, text = await client._fetch_file(
+            mock_http, asyncio.Semaphore(1), "psf", "requests", "main", "logo.dat"
+        )
+
+        assert text is None
+
+    async def test_failed_download_returns_none(self):
+        client = GitHubClient()
+        mock_http = MagicMock()
+        mock_http.stream = MagicMock(return_value=_stream_response(404, b""))
+
+        _, text = await client._fetch_file(
+            mock_http, asyncio.Semaphore(1), "psf", "requests", "main", "gone.py"
+        )
+
+        assert text is None
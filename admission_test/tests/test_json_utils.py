@@ -0,0 +1,19 @@
+import json
+import math
+import pytest
+from app.utils.json_utils import loads_json
+
+
+class TestLoadsJson:
+    def test_parses_bytes(self):
+        assert loads_json(b'{"tree": [{"path": "README.md"}]}') == {
+            "tree": [{"path": "README.md"}]
+        }
+
+    def test_falls_back_to_stdlib_for_nan(self):
+        # orjson rejects NaN; the stdlib parser accepts it
+        assert math.isnan(loads_json('{"x": NaN}')["x"])
+
+    def test_invalid_json_raises_value_error(self):
+        with pytest.raises(json.JSONDecodeError):
+            loads_json("Not valid JSON")
@@ -41,3 +41,12 @@ class TestSummarizeResponse:
         )
         assert resp.summary == "A library"
         assert resp.technologies == ["Python"]
+
+    def test_is_frozen(self):
+        resp = SummarizeResponse(
+            summary="A library",
+            technologies=["Python"],
+            structure="Simple layout",
+        )
+        with pytest.raises(ValueError):
+            resp.summary = "Changed"
@@ -0,0 +1,111 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.utils.rate_limit import AdaptiveSemaphore
+
+
+class TestUpdate:
+    def test_full_capacity_with_headroom(self):
+        limiter = AdaptiveSemaphore(capacity=16)
+        limiter.update({"x-ratelimit-remaining": "4000"})
+        assert limiter.capacity == 16
+
+    def test_shrinks_when_low(self):
+        limiter = AdaptiveSemaphore(capacity=16, low_capacity=4)
+        limiter.update({"x-ratelimit-remaining": "30"})
+        assert limiter.capacity == 4
+
+    def test_serializes_when_critical(self):
+        limiter = AdaptiveSemaphore(capacity=16)
+        limiter.update({"x-ratelimit-remaining": "5"})
+        assert limiter.capacity == 1
+
+    def test_recovers_after_reset(self):
+        limiter = AdaptiveSemaphore(capacity=16)
+        limiter.update({"x-ratelimit-remaining": "5"})
+        limiter.update({"x-ratelimit-remaining": "5000"})
+        assert limiter.capacity == 16
+
+    def test_ignores_responses_without_headers(self):
+        limiter = AdaptiveSemaphore(capacity=16)
+        limiter.update({"x-ratelimit-remaining": "5"})
+        limiter.update({"content-type": "text/plain"})
+        assert limiter.capacity == 1
+        assert limiter.remaining == 5
+
+
+@pytest.mark.asyncio
+class TestAcquire:
+    async def test_bounds_concurrency(self):
+        limiter = AdaptiveSemaphore(capacity=3)
+        active = 0
+        peak = 0
+
+        async def worker():
+            nonlocal active, peak
+            async with limiter:
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        await asyncio.gather(*[worker() for _ in range(10)])
+
+        assert peak == 3
+
+    async def test_waits_for_reset_when_critical(self):
+        limiter = AdaptiveSemaphore(max_wait=30.0)
+        limiter.update(
+            {
+                "x-ratelimit-remaining": "1",
+                "x-ratelimit-reset": str(int(time.time()) + 10),
+            }
+        )
+
+        with patch("app.utils.rate_limit.asyncio.sleep", new=AsyncMock()) as sleep:
+            async with limiter:
+                pass
+
+        sleep.assert_awaited_once()
+        assert 0 < sleep.await_args.args[0] <= 10
+
+    async def test_distant_reset_proceeds_without_waiting(self):
+        limiter = AdaptiveSemaphore(max_wait=30.0)
+        limiter.update(
+            {
+                "x-ratelimit-remaining": "1",
+                "x-ratelimit-reset": str(int(time.time()) + 3000),
+            }
+        )
+
+        with patch("app.utils.rate_limit.asyncio.sleep", new=AsyncMock()) as sleep:
+            async with limiter:
+                pass
+
+        # Sleeping only part of the window would not prevent the 403
+        sleep.assert_not_awaited()
+
+    async def test_reset_wait_does_not_hold_a_slot(self):
+        limiter = AdaptiveSemaphore(max_wait=60.0)
+        limiter.update(
+            {
+                "x-ratelimit-remaining": "1",
+                "x-ratelimit-reset": str(int(time.time()) + 30),
+            }
+        )
+
+        async def worker():
+            async with limiter:
+                pass
+
+        task = asyncio.create_task(worker())
+        await asyncio.sleep(0)  # Let it start waiting for the reset
+        assert limiter._in_use == 0
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert limiter._in_use == 0
+        limiter.update({"x-ratelimit-remaining": "5000"})
+        await asyncio.wait_for(worker(), timeout=1.0)
@@ -1,7 +1,14 @@
 import pytest
 import json
 from unittest.mock import AsyncMock, patch, MagicMock
-from app.services.llm_summarizer import Summarizer, SummarizerError
+from app.config import Settings
+from app.services.cache import make_cache_key
+from app.services.llm_summarizer import (
+    RESPONSE_FORMAT,
+    SYSTEM_PROMPT,
+    Summarizer,
+    SummarizerError,
+)
 from app.services.github_client import RepoData
 
 
@@ -46,6 +53,16 @@ class TestBuildPrompt:
         assert "50000" in prompt or "50,000" in prompt
 
 
+class TestGetClient:
+    def test_client_is_reused_across_summarizers(self):
+        settings = Settings(openai_api_key="sk-test")
+        assert Summarizer(settings)._get_client() is Summarizer(settings)._get_client()
+
+    def test_missing_api_key_raises(self):
+        with pytest.raises(SummarizerError):
+            Summarizer(Settings())._get_client()
+
+
 @pytest.mark.asyncio
 class TestSummarize:
     async def test_successful_summarization(self, sample_repo_data):
@@ -75,6 +92,9 @@ class TestSummarize:
         assert result["summary"] == "Requests is a Python HTTP library."
         assert "Python" in result["technologies"]
         assert "structure" in result
+        call_kwargs = mock_client.chat.completions.create.call_args.kwargs
+        assert call_kwargs["response_format"] is RESPONSE_FORMAT
+        assert RESPONSE_FORMAT["json_schema"]["strict"] is True
 
     async def test_handles_malformed_json(self, sample_repo_data):
         summarizer = Summarizer()
@@ -90,3 +110,58 @@ class TestSummarize:
         with patch.object(summarizer, "_get_client", return_value=mock_client):
             with pytest.raises(SummarizerError):
                 await summarizer.summarize(sample_repo_data)
+
+    async def test_wrong_shape_raises(self, sample_repo_data):
+        summarizer = Summarizer()
+
+        content = json.dumps({
+            "summary": "A library.",
+            "technologies": "notalist",
+            "structure": "src/",
+        })
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock(message=MagicMock(content=content))]
+
+        mock_client = AsyncMock()
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+
+        with patch.object(summarizer, "_get_client", return_value=mock_client):
+            with pytest.raises(SummarizerError):
+                await summarizer.summarize(sample_repo_data)
+
+    async def test_refusal_raises(self, sample_repo_data):
+        summarizer = Summarizer()
+
+        mock_response = MagicMock()
+        mock_response.choices = [
+            MagicMock(message=MagicMock(content=None, refusal="I can't help with that."))
+        ]
+
+        mock_client = AsyncMock()
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+
+        with patch.object(summarizer, "_get_client", return_value=mock_client):
+            with pytest.raises(SummarizerError, match="refused"):
+                await summarizer.summarize(sample_repo_data)
+
+    async def test_cache_hit_skips_llm_call(self, sample_repo_data, tmp_path):
+        # No API key: a cache hit must be served before the client is built
+        summarizer = Summarizer(Settings(cache_dir=str(tmp_path)))
+        cached = {
+            "summary": "Cached summary.",
+            "technologies": ["Python"],
+            "structure": "Cached structure.",
+        }
+        summarizer.cache.set(
+            make_cache_key(
+                "llm",
+                summarizer.settings.openai_model,
+                SYSTEM_PROMPT,
+                summarizer.build_user_prompt(sample_repo_data),
+            ),
+            cached,
+        )
+
+        result = await summarizer.summarize(sample_repo_data)
+
+        assert result == cached